@@ -7,14 +7,50 @@ Improved prompts for better detection of trading indicators
 import os
 import json
 import base64
+import hashlib
 import logging
+import random
+import cv2
+import numpy as np
 import openai
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
 from typing import Optional, List, Dict, Tuple
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
 
+try:
+    from orjson import loads as _json_loads  # C parser; its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as _json_loads
 
-@dataclass
+
+# Most charts any caller extracts at once: neil_bot's ocr_executor and the test scripts use 8 threads
+MAX_CONCURRENT_CHARTS = 8
+
+
+# Prompt lines tagged "- LONG:" / "- SHORT:" only apply to that trade direction
+def _bake_prompt(prompt: str, trade_direction: str) -> str:
+    """Specialize a strategy prompt for one trade direction, dropping the other side's rules"""
+    own_tag, other_tag = ("- LONG:", "- SHORT:") if trade_direction == "LONG" else ("- SHORT:", "- LONG:")
+    lines = []
+    for line in prompt.splitlines():
+        if line.startswith(other_tag):
+            continue
+        if line.startswith(own_tag):
+            line = "-" + line[len(own_tag):]
+        lines.append(line)
+    lines.append(f"Trade direction: {trade_direction}.")
+    return "\n".join(lines)
+
+
+# Characters dropped from price strings before float()
+_PRICE_STRIP = str.maketrans("", "", "$, \t\n")
+
+
+@dataclass(slots=True)
 class ChartExtractionResult:
     """Result from chart extraction with detailed information"""
     stop_loss: Optional[float] = None
@@ -30,208 +66,243 @@ class ChartExtractionResult:
     raw_extraction: Optional[Dict] = None  # Store raw GPT response for debugging
 
 
+@dataclass(slots=True)
+class PreparedChart:
+    """A chart read, hashed and encoded once by ChartPriceExtractor.prepare_image"""
+    image_hash: str
+    image_part: Dict  # Message part with the resized image as a base64 data URL
+
+
 class ChartPriceExtractor:
     """Advanced chart extractor with multiple extraction strategies"""
 
     # Define different prompt strategies for various chart types
     EXTRACTION_STRATEGIES = {
-        "comprehensive": """You are an expert trading chart analyst. Extract ALL price levels from this trading chart.
-
-WHAT TO LOOK FOR:
-1. COLORED ZONES/BOXES:
-   • RED boxes/zones/rectangles = Stop Loss (SL)
-   • GREEN/TEAL/BLUE boxes/zones = Take Profits (TP1, TP2, TP3)
-   • YELLOW/ORANGE zones = Entry zones
-   • Look for price values written INSIDE these colored areas
-
-2. HORIZONTAL LINES:
-   • Solid horizontal lines with price labels
-   • Dashed/dotted lines indicating key levels
-   • Support and resistance lines
-
-3. TEXT ANNOTATIONS:
-   • Price labels on the right axis
-   • Text directly on the chart showing prices
-   • Labels like "TP1:", "TP2:", "SL:", "Entry:"
-   • Numbers inside or near colored zones
-
-4. VISUAL INDICATORS:
-   • Arrows pointing to specific price levels
-   • Crosshairs or markers at entry points
-   • Any highlighted price values
-
-EXTRACTION RULES:
-- Read EXACT prices, including all decimal places
-- Look for prices both inside colored zones AND on the price axis
-- If you see multiple similar prices, they are likely different levels
-- Entry price might be marked as "CMP" (Current Market Price) or with an arrow
-
-OUTPUT FORMAT (JSON only):
-{
-  "stop_loss": [exact price or null],
-  "take_profit_1": [exact price or null],
-  "take_profit_2": [exact price or null],
-  "take_profit_3": [exact price or null],
-  "entry_price": [exact price or null],
-  "current_price": [current market price if visible],
-  "additional_levels": [any other important price levels as array]
-}""",
-
-        "box_focused": """Focus on extracting prices from COLORED BOXES and RECTANGLES on this trading chart.
-
-STEP 1: Identify all colored rectangular zones
-- RED boxes = Stop Loss levels
-- GREEN/TEAL boxes = Take Profit levels
-- Look for text/numbers INSIDE each box
-
-STEP 2: Read the exact price value in each box
-- Prices are usually displayed as white or black text inside the colored area
-- May appear as: "197.63" or "TP1: 197.63" or just the number
-
-STEP 3: Check box borders
-- Some boxes have the price written on their border/edge
-- Look at where boxes meet the right price axis
-
-CRITICAL: Each colored box represents a different price level
-- Don't skip any boxes
-- Read every number carefully
-
-Return JSON with exact prices from each box:
-{
-  "stop_loss": [price from red box],
-  "take_profit_1": [price from first green box],
-  "take_profit_2": [price from second green box],
-  "take_profit_3": [price from third green box],
-  "entry_price": [entry price if marked]
-}""",
-
-        "line_focused": """Extract prices from HORIZONTAL LINES and PRICE AXIS on this trading chart.
-
-WHAT TO IDENTIFY:
-1. Horizontal lines crossing the chart
-2. Where each line intersects the right price axis
-3. Price values displayed at these intersection points
-
-HOW TO READ:
-- Follow each horizontal line to the right edge
-- Read the exact price value where it meets the scale
-- Lines may be solid, dashed, or dotted
-- Different colors indicate different purposes:
-  * Red lines = Stop Loss
-  * Green lines = Take Profits
-  * White/gray = Support/Resistance
-
-IMPORTANT:
-- Some lines have labels directly on them
-- Check for small text boxes attached to lines
-- Entry point may be marked with an arrow
-
-Return exact prices in JSON:
-{
-  "stop_loss": [lowest/highest price depending on trade direction],
-  "take_profit_1": [first target price],
-  "take_profit_2": [second target price],
-  "take_profit_3": [third target price],
-  "entry_price": [entry level if marked]
-}""",
-
-        "annotation_focused": """Extract all TEXT ANNOTATIONS and LABELS showing prices on this chart.
-
-SEARCH FOR:
-1. Any numbers that look like prices (e.g., 197.63, 1.0823)
-2. Labels with "TP1", "TP2", "TP3", "SL", "Entry"
-3. Price values in corners or margins
-4. Numbers inside colored zones
-5. Text overlaid on the chart
-
-COMMON LOCATIONS:
-- Inside colored rectangles
-- Along the right price axis
-- Floating text on the chart
-- Near arrows or markers
-- In legend or info boxes
-
-READ CAREFULLY:
-- Include ALL decimal places
-- Don't confuse similar numbers (202 vs 208)
-- If multiple prices are close together, they're different levels
-
-Output as JSON with all found prices:
-{
-  "stop_loss": [price labeled as SL or in red],
-  "take_profit_1": [price labeled as TP1],
-  "take_profit_2": [price labeled as TP2],
-  "take_profit_3": [price labeled as TP3],
-  "entry_price": [entry or current price],
-  "all_prices_found": [array of all price values seen]
-}"""
+        "comprehensive": """Extract the trade levels from this trading chart.
+- RED zone/line or "SL" label = stop_loss
+- GREEN/TEAL zones/lines or "TP1/TP2/TP3" labels = take_profit_1..3, nearest to entry first
+- YELLOW/ORANGE zone, arrow or "Entry"/"CMP" label = entry_price
+- Read prices inside the zones and where the lines meet the right price axis
+- Copy every digit and decimal exactly; close prices are different levels
+- LONG: stop_loss is below entry and targets rise, TP1 < TP2 < TP3
+- SHORT: stop_loss is above entry and targets fall, TP1 > TP2 > TP3
+
+Return JSON: {"stop_loss": n, "take_profit_1": n, "take_profit_2": n, "take_profit_3": n, "entry_price": n, "current_price": n}
+Use null for anything not visible.""",
+
+        "box_focused": """Read the prices in the COLORED BOXES on this trading chart.
+- RED box = stop_loss
+- GREEN/TEAL boxes = take_profit_1..3, nearest to entry first
+- The price is the text inside the box, on its edge, or where it meets the right axis
+- Every box is a separate level; copy each digit exactly
+- LONG: stop_loss is below entry and targets rise, TP1 < TP2 < TP3
+- SHORT: stop_loss is above entry and targets fall, TP1 > TP2 > TP3
+
+Return JSON: {"stop_loss": n, "take_profit_1": n, "take_profit_2": n, "take_profit_3": n, "entry_price": n}
+Use null for anything not visible.""",
+
+        "line_focused": """Read the prices of the HORIZONTAL LINES on this trading chart.
+- Follow each line to the right price axis and read its label
+- RED line = stop_loss, GREEN lines = take_profit_1..3, nearest to entry first
+- An arrow or "Entry" label marks entry_price
+- Copy every digit exactly
+- LONG: stop_loss is below entry and targets rise, TP1 < TP2 < TP3
+- SHORT: stop_loss is above entry and targets fall, TP1 > TP2 > TP3
+
+Return JSON: {"stop_loss": n, "take_profit_1": n, "take_profit_2": n, "take_profit_3": n, "entry_price": n}
+Use null for anything not visible.""",
+
+        "annotation_focused": """Read every TEXT LABEL that shows a price on this trading chart.
+- "SL" or red label = stop_loss; "TP1/TP2/TP3" or green labels = take_profit_1..3
+- "Entry"/"CMP" label or the current price = entry_price
+- Check colored zones, the right axis, arrows and legend boxes
+- Copy every digit exactly; 202 and 208 are different numbers
+- LONG: stop_loss is below entry and targets rise, TP1 < TP2 < TP3
+- SHORT: stop_loss is above entry and targets fall, TP1 > TP2 > TP3
+
+Return JSON: {"stop_loss": n, "take_profit_1": n, "take_profit_2": n, "take_profit_3": n, "entry_price": n, "all_prices_found": [up to 10 prices]}
+Use null for anything not visible."""
     }
 
-    def __init__(self, gpt4_api_key: str = None):
-        """Initialize with GPT-4 API key"""
-        self.openai_client = openai.OpenAI(api_key=gpt4_api_key) if gpt4_api_key else None
+    # One request for several charts - answers must come back in image order
+    BATCH_PROMPT = """You will see {count} {direction} trading chart images. For EACH image, in the order given, extract:
+- stop_loss: price of the RED zone/line or SL label
+- take_profit_1, take_profit_2, take_profit_3: GREEN zone/line or TP prices, nearest to entry first
+- entry_price: entry or current price
+
+Read every digit exactly and include all decimal places.
+
+Output as JSON with exactly {count} objects in "results", one per image:
+{{
+  "results": [
+    {{"stop_loss": 0.0, "take_profit_1": 0.0, "take_profit_2": 0.0, "take_profit_3": 0.0, "entry_price": 0.0}}
+  ]
+}}
+Use null for any level that isn't visible."""
+
+    # Pre-flight limits checked before any API call
+    MAX_IMAGE_BYTES = 20 * 1024 * 1024
+    IMAGE_SIGNATURES = ((b"\x89PNG", "image/png"), (b"\xff\xd8\xff", "image/jpeg"), (b"GIF8", "image/gif"))
+
+    # Transient failures worth retrying (429, 5xx, timeouts, dropped connections)
+    RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError,
+                        openai.APIConnectionError, openai.InternalServerError)
+    MAX_API_ATTEMPTS = 5
+
+    # Strategies raced by extract_prices, in order of preference when none validates cleanly
+    PIPELINE_STRATEGIES = ("comprehensive", "box_focused", "line_focused")
+    PIPELINE_TIME_BUDGET = 30  # seconds, default for time_budget
+
+    # Part of every disk cache entry's name: editing any strategy prompt invalidates old results
+    PROMPT_VERSION = hashlib.blake2b("\0".join(EXTRACTION_STRATEGIES.values()).encode("utf-8"),
+                                     digest_size=6).hexdigest()
+
+    # Encoded image parts kept for the LONG/SHORT pair (and retries) of the same chart
+    IMAGE_PART_CACHE_SIZE = 8
+
+    def __init__(self, gpt4_api_key: str = None, max_long_side: int = 2048,
+                 max_short_side: int = 768, jpeg_quality: int = 85, cache_size: int = 512,
+                 force_detail: Optional[str] = None, cache_dir: Optional[str] = None,
+                 time_budget: float = PIPELINE_TIME_BUDGET):
+        """
+        Initialize with GPT-4 API key, upload size limits and result cache size
+
+        cache_dir additionally keeps results on disk (one JSON per chart + direction), so
+        re-running a script over the same charts skips the API entirely.
+
+        time_budget caps the strategy race per chart; callers with their own timeout should
+        pass less than it, so the best result so far comes back instead of their timeout firing.
+        """
+        # Retries are handled by _stream_completion so backoff lives in one place
+        self.openai_client = openai.OpenAI(api_key=gpt4_api_key, max_retries=0) if gpt4_api_key else None
+        self.max_long_side = max_long_side
+        self.max_short_side = max_short_side
+        self.jpeg_quality = jpeg_quality
+        self.force_detail = force_detail  # "low"/"high" to skip the size-based choice
+        self.time_budget = time_budget
+
+        # Strategy prompts specialized per trade direction once, not per call
+        self._prompts = {
+            direction: {name: _bake_prompt(prompt, direction) for name, prompt in self.EXTRACTION_STRATEGIES.items()}
+            for direction in ("LONG", "SHORT")
+        }
+
+        # LRU of (image hash, direction) -> asdict(result); the bot calls us from worker threads
+        self.cache_size = cache_size
+        self._result_cache = OrderedDict()
+        self._image_part_cache = OrderedDict()  # image hash -> _build_image_part output
+        self._cache_lock = threading.Lock()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         logging.info("Advanced chart extractor initialized with GPT-4 Vision")
 
-    def extract_prices(self, image_path: str, trade_direction: str = "LONG") -> ChartExtractionResult:
+    def close(self):
+        """Close the API client's pooled connections"""
+        if self.openai_client:
+            self.openai_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def extract_prices(self, image_path: str, trade_direction: str = "LONG",
+                       bypass_cache: bool = False) -> ChartExtractionResult:
         """
         Main extraction pipeline - tries multiple strategies for best results
 
         Args:
             image_path: Path to chart image
             trade_direction: "LONG" or "SHORT" to validate price relationships
+            bypass_cache: Always call the API even if this exact chart was seen before
+        """
+        try:
+            raw = self._read_image(image_path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Skipping chart {image_path}: {e}")
+            return ChartExtractionResult(validation_errors=[str(e)])
+
+        return self.extract_prices_from_bytes(raw, trade_direction, bypass_cache)
+
+    def extract_prices_from_bytes(self, raw: bytes, trade_direction: str = "LONG",
+                                  bypass_cache: bool = False) -> ChartExtractionResult:
+        """
+        Same pipeline as extract_prices, for an image already in memory (e.g. just downloaded)
+
+        Args:
+            raw: Encoded image bytes (PNG, JPEG or GIF)
+            trade_direction: "LONG" or "SHORT" to validate price relationships
+            bypass_cache: Always call the API even if this exact chart was seen before
         """
         start_time = time.time()
 
         try:
-            if not os.path.exists(image_path):
-                logging.error(f"Image file not found: {image_path}")
-                return ChartExtractionResult()
+            self._check_image(raw)
+        except ValueError as e:
+            logging.error(f"Skipping chart: {e}")
+            return ChartExtractionResult(validation_errors=[str(e)])
+
+        image_hash = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        return self._extract(image_hash, trade_direction, bypass_cache, start_time, raw=raw)
 
+    def prepare_image(self, image_path: str) -> PreparedChart:
+        """
+        Read, validate, hash and encode a chart once, for several extract_prices_prepared calls
+        (e.g. the same chart as both LONG and SHORT)
+
+        Raises OSError or ValueError for a missing or invalid image.
+        """
+        raw = self._read_image(image_path)
+        image_hash = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        return PreparedChart(image_hash=image_hash, image_part=self._get_image_part(image_hash, raw))
+
+    def extract_prices_prepared(self, prepared: PreparedChart, trade_direction: str = "LONG",
+                                bypass_cache: bool = False) -> ChartExtractionResult:
+        """Same pipeline as extract_prices, for a chart from prepare_image"""
+        return self._extract(prepared.image_hash, trade_direction, bypass_cache, time.time(),
+                             image_part=prepared.image_part)
+
+    def _extract(self, image_hash: str, trade_direction: str, bypass_cache: bool, start_time: float,
+                 raw: Optional[bytes] = None, image_part: Optional[Dict] = None) -> ChartExtractionResult:
+        """Cache lookup, then the strategy race - encodes raw only when the API is actually needed"""
+        try:
             if not self.openai_client:
                 logging.error("No GPT-4 API key provided!")
                 return ChartExtractionResult()
 
-            # Try comprehensive strategy first
-            logging.info("🔍 Attempting comprehensive extraction strategy...")
-            result = self._extract_with_strategy(image_path, "comprehensive")
-
-            # Validate the extraction
-            validation_errors = self._validate_extraction(result, trade_direction)
-
-            if not validation_errors:
-                logging.info("✅ Comprehensive strategy succeeded!")
-                result.validation_passed = True
-            else:
-                logging.warning(f"⚠️ Validation issues: {validation_errors}")
-                result.validation_errors = validation_errors
-
-                # Try box-focused strategy if comprehensive failed
-                logging.info("🔍 Trying box-focused extraction strategy...")
-                box_result = self._extract_with_strategy(image_path, "box_focused")
-                box_errors = self._validate_extraction(box_result, trade_direction)
-
-                if not box_errors or len(box_errors) < len(validation_errors):
-                    logging.info("📦 Box-focused strategy provided better results")
-                    result = box_result
-                    result.validation_errors = box_errors
-                    result.validation_passed = not bool(box_errors)
-                else:
-                    # Try line-focused as last resort
-                    logging.info("🔍 Trying line-focused extraction strategy...")
-                    line_result = self._extract_with_strategy(image_path, "line_focused")
-                    line_errors = self._validate_extraction(line_result, trade_direction)
-
-                    if not line_errors or len(line_errors) < len(validation_errors):
-                        logging.info("📈 Line-focused strategy provided better results")
-                        result = line_result
-                        result.validation_errors = line_errors
-                        result.validation_passed = not bool(line_errors)
+            # Same screenshot + direction means the same answer at temperature 0
+            cache_key = (image_hash, trade_direction)
+            if not bypass_cache:
+                cached = self._get_cached_result(cache_key)
+                if cached is None and self.cache_dir:
+                    cached = self._load_disk_result(cache_key)
+                if cached:
+                    logging.info("♻️ Chart seen before - reusing cached extraction")
+                    cached.processing_time = time.time() - start_time
+                    return cached
+
+            # Encode once and share the same image part across every strategy call, and with
+            # the other direction when the same chart is extracted as both LONG and SHORT
+            if image_part is None:
+                image_part = self._get_image_part(image_hash, raw)
+
+            # Race every strategy; the first result that passes validation wins
+            futures = {
+                _STRATEGY_EXECUTOR.submit(self._run_strategy, image_part, strategy, trade_direction): strategy
+                for strategy in self.PIPELINE_STRATEGIES
+            }
+            logging.info(f"🔍 Running {len(futures)} extraction strategies in parallel...")
+            result = self._race_strategies(futures, start_time + self.time_budget)
 
             result.processing_time = time.time() - start_time
 
             # Log extraction summary
             self._log_extraction_summary(result)
 
+            # Only validated answers are reused; a misread chart gets a fresh attempt next time
+            if result.validation_passed:
+                self._store_cached_result(cache_key, result)
+
             return result
 
         except Exception as e:
@@ -241,15 +312,245 @@ Output as JSON with all found prices:
                 validation_errors=[str(e)]
             )
 
-    def _extract_with_strategy(self, image_path: str, strategy: str) -> ChartExtractionResult:
-        """Extract prices using a specific strategy"""
+    def _run_strategy(self, image_part: Dict, strategy: str,
+                      trade_direction: str) -> Tuple[ChartExtractionResult, List[str]]:
+        """Extract with one strategy and validate it in the same worker thread"""
+        result = self._extract_with_strategy(image_part, strategy, trade_direction)
+        return result, self._validate_extraction(result, trade_direction)
+
+    def _race_strategies(self, futures: Dict, deadline: float) -> ChartExtractionResult:
+        """
+        Wait for strategy futures until one validates cleanly or the deadline passes
+
+        Falls back to the result with the fewest validation errors, preferring
+        strategies in PIPELINE_STRATEGIES order on ties.
+        """
+        outcomes = {}
+        pending = set(futures)
         try:
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.time()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    logging.warning(f"⏱️ Strategy budget of {self.time_budget}s used up")
+                    break
+
+                for future in done:
+                    strategy = futures[future]
+                    result, errors = future.result()
+                    if not errors:
+                        logging.info(f"✅ {strategy} strategy passed validation")
+                        result.validation_passed = True
+                        return result
+                    logging.warning(f"⚠️ {strategy} validation issues: {errors}")
+                    outcomes[strategy] = (result, errors)
+        finally:
+            # Strategies already talking to the API finish in the background and are ignored
+            for future in pending:
+                future.cancel()
+
+        if not outcomes:
+            return ChartExtractionResult(validation_errors=["All extraction strategies timed out"])
+
+        strategy = min(outcomes, key=lambda s: (len(outcomes[s][1]), self.PIPELINE_STRATEGIES.index(s)))
+        result, errors = outcomes[strategy]
+        logging.info(f"📦 Using {strategy} strategy ({len(errors)} validation issue(s))")
+        result.validation_errors = errors
+        return result
+
+    def extract_prices_batch(self, image_paths: List[str], trade_direction: str = "LONG",
+                             batch_size: int = 20) -> List[ChartExtractionResult]:
+        """
+        Extract several charts with one GPT-4 request per batch of images
 
-            prompt = self.EXTRACTION_STRATEGIES.get(strategy, self.EXTRACTION_STRATEGIES["comprehensive"])
+        Args:
+            image_paths: Paths to chart images (results come back in the same order)
+            trade_direction: "LONG" or "SHORT", applied to every chart
+            batch_size: Maximum number of images sent in one request
 
-            response = self.openai_client.chat.completions.create(
+        Any chart whose batched answer is missing or fails validation is re-run
+        on its own through extract_prices.
+        """
+        results = []
+        for i in range(0, len(image_paths), batch_size):
+            results.extend(self._extract_batch(image_paths[i:i + batch_size], trade_direction))
+        return results
+
+    def _extract_batch(self, image_paths: List[str], trade_direction: str) -> List[ChartExtractionResult]:
+        """Send one batch of charts in a single request and validate each answer"""
+        start_time = time.time()
+        answers = []
+
+        if self.openai_client:
+            try:
+                image_parts = []
+                for image_path in image_paths:
+                    image_parts.append(self._build_image_part(self._read_image(image_path)))
+
+                logging.info(f"📚 Extracting {len(image_paths)} charts in one batched request...")
+                content = self._stream_completion(
+                    model="gpt-4o",
+                    messages=[{
+                        "role": "user",
+                        "content": [{"type": "text", "text": self.BATCH_PROMPT.format(
+                            count=len(image_paths), direction=trade_direction)}]
+                                   + image_parts
+                    }],
+                    max_tokens=150 * len(image_paths),
+                    temperature=0,
+                    top_p=0.1,
+                    response_format={"type": "json_object"},
+                    timeout=120
+                )
+
+                answers = _json_loads(content).get('results') or []
+
+            except Exception as e:
+                logging.error(f"Batch extraction failed, falling back to single charts: {e}")
+
+        results = []
+        for index, image_path in enumerate(image_paths):
+            data = answers[index] if index < len(answers) and isinstance(answers[index], dict) else None
+            result = self._result_from_data(data, "batch") if data else None
+            errors = self._validate_extraction(result, trade_direction) if result else None
+
+            if errors is None or errors:
+                logging.info(f"🔁 Re-running chart {index + 1} on its own: {errors or 'no batched answer'}")
+                result = self.extract_prices(image_path, trade_direction)
+            else:
+                result.validation_passed = True
+                result.processing_time = time.time() - start_time
+                self._log_extraction_summary(result)
+
+            results.append(result)
+
+        return results
+
+    def extract_prices_via_batch_api(self, image_paths: List[str], directions: List[str] = ("LONG", "SHORT"),
+                                     strategy: str = "comprehensive", poll_interval: float = 15,
+                                     max_wait: float = 24 * 3600) -> Dict[Tuple[str, str], ChartExtractionResult]:
+        """
+        Extract every (chart, direction) pair through the OpenAI Batch API
+
+        Not to be confused with extract_prices_batch, which packs charts into live requests.
+
+        Half the price of live requests, but answers can take anywhere from minutes up to
+        the 24h completion window - meant for offline runs, not the bot.
+
+        Args:
+            image_paths: Paths to chart images
+            directions: Trade directions to extract each chart as
+            strategy: EXTRACTION_STRATEGIES prompt to use
+            poll_interval: Seconds between batch status checks
+            max_wait: Give up polling (and fall back to live requests) after this many seconds
+
+        Returns {(image_path, direction): result}. Pairs the batch didn't answer, or whose
+        answer fails validation, are re-run on their own through extract_prices.
+        """
+        answers = {}
+
+        if self.openai_client:
+            try:
+                # One request line per pair; each chart is read and encoded once for all directions
+                lines = []
+                for index, image_path in enumerate(image_paths):
+                    try:
+                        image_part = self._build_image_part(self._read_image(image_path))
+                    except (OSError, ValueError) as e:
+                        logging.error(f"Skipping chart {image_path}: {e}")
+                        continue
+                    for direction in directions:
+                        lines.append(json.dumps({
+                            "custom_id": f"{index}|{direction}",
+                            "method": "POST",
+                            "url": "/v1/chat/completions",
+                            "body": {
+                                "model": "gpt-4o",
+                                "messages": [{
+                                    "role": "user",
+                                    "content": [{"type": "text", "text": self._prompts[direction][strategy]},
+                                                image_part]
+                                }],
+                                "max_tokens": 150,
+                                "temperature": 0,
+                                "top_p": 0.1,
+                                "response_format": {"type": "json_object"}
+                            }
+                        }))
+
+                if lines:
+                    answers = self._run_batch_job(lines, poll_interval, time.time() + max_wait)
+            except Exception as e:
+                logging.error(f"Batch API extraction failed, falling back to single charts: {e}")
+
+        results = {}
+        for index, image_path in enumerate(image_paths):
+            for direction in directions:
+                results[(image_path, direction)] = self._batch_answer_result(
+                    answers.get(f"{index}|{direction}"), image_path, direction)
+
+        return results
+
+    def _batch_answer_result(self, data: Optional[Dict], image_path: str,
+                             direction: str) -> ChartExtractionResult:
+        """Validate one Batch API answer, re-running the chart live if it's missing or invalid"""
+        result = self._result_from_data(data, "batch_api") if isinstance(data, dict) else None
+        errors = self._validate_extraction(result, direction) if result else None
+
+        if errors is None or errors:
+            logging.info(f"🔁 Re-running {image_path} ({direction}) on its own: {errors or 'no batch answer'}")
+            return self.extract_prices(image_path, direction)
+
+        result.validation_passed = True
+        self._log_extraction_summary(result)
+        return result
+
+    def _run_batch_job(self, lines: List[str], poll_interval: float, deadline: float) -> Dict[str, Dict]:
+        """Upload batch request lines, wait for the job and return parsed answers by custom_id"""
+        input_file = self.openai_client.files.create(
+            file=("chart_batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = self.openai_client.batches.create(input_file_id=input_file.id,
+                                                  endpoint="/v1/chat/completions",
+                                                  completion_window="24h")
+        logging.info(f"📮 Submitted batch {batch.id} ({len(lines)} requests)")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if time.time() >= deadline:
+                self.openai_client.batches.cancel(batch.id)
+                raise TimeoutError(f"batch {batch.id} still {batch.status}")
+            time.sleep(poll_interval)
+            batch = self.openai_client.batches.retrieve(batch.id)
+
+        logging.info(f"📬 Batch {batch.id} {batch.status}")
+        if not batch.output_file_id:
+            return {}
+
+        answers = {}
+        for line in self.openai_client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item = _json_loads(line)
+            response = item.get("response") or {}
+            if item.get("error") or response.get("status_code") != 200:
+                logging.warning(f"Batch request {item.get('custom_id')} failed: "
+                                f"{item.get('error') or response.get('status_code')}")
+                continue
+            try:
+                answers[item["custom_id"]] = _json_loads(response["body"]["choices"][0]["message"]["content"])
+            except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+                logging.warning(f"Unreadable batch answer for {item.get('custom_id')}: {e}")
+        return answers
+
+    def _extract_with_strategy(self, image_part: Dict, strategy: str,
+                               trade_direction: str = "LONG") -> ChartExtractionResult:
+        """Extract prices using a specific strategy"""
+        try:
+            prompt = self._prompts.get(trade_direction, {}).get(strategy)
+            if prompt is None:
+                prompt = _bake_prompt(self.EXTRACTION_STRATEGIES.get(
+                    strategy, self.EXTRACTION_STRATEGIES["comprehensive"]), trade_direction)
+
+            content = self._stream_completion(
                 model="gpt-4o",
                 messages=[{
                     "role": "user",
@@ -258,62 +559,20 @@ Output as JSON with all found prices:
                             "type": "text",
                             "text": prompt
                         },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{image_data}",
-                                "detail": "high"
-                            }
-                        }
+                        image_part
                     ]
                 }],
-                max_tokens=500,
-                temperature=0
+                max_tokens=150,
+                temperature=0,
+                top_p=0.1,
+                response_format={"type": "json_object"},
+                timeout=120
             )
 
-            # Parse response
-            content = response.choices[0].message.content.strip()
-
-            # Clean up markdown formatting if present
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-            elif '```' in content:
-                content = content.split('```')[1].split('```')[0]
-
             # Parse JSON
-            data = json.loads(content)
-
-            result = ChartExtractionResult(
-                stop_loss=self._parse_price(data.get('stop_loss')),
-                take_profit_1=self._parse_price(data.get('take_profit_1')),
-                take_profit_2=self._parse_price(data.get('take_profit_2')),
-                take_profit_3=self._parse_price(data.get('take_profit_3')),
-                entry_price=self._parse_price(data.get('entry_price')),
-                confidence_score=0.85,
-                extraction_method=f"gpt4_vision_{strategy}",
-                raw_extraction=data
-            )
-
-            # Check if we got additional useful data
-            if 'current_price' in data and data['current_price'] and not result.entry_price:
-                result.entry_price = self._parse_price(data['current_price'])
-
-            # Boost confidence if we found multiple price levels
-            found_count = sum([
-                result.stop_loss is not None,
-                result.take_profit_1 is not None,
-                result.take_profit_2 is not None,
-                result.take_profit_3 is not None
-            ])
-
-            if found_count >= 3:
-                result.confidence_score = 0.95
-            elif found_count >= 2:
-                result.confidence_score = 0.85
-            else:
-                result.confidence_score = 0.70
+            data = _json_loads(content)
 
-            return result
+            return self._result_from_data(data, strategy)
 
         except json.JSONDecodeError as e:
             logging.error(f"Failed to parse GPT-4 response as JSON: {e}")
@@ -322,22 +581,246 @@ Output as JSON with all found prices:
             logging.error(f"Strategy {strategy} extraction failed: {e}")
             return ChartExtractionResult(extraction_method=f"gpt4_vision_{strategy}_failed")
 
-    def _parse_price(self, value) -> Optional[float]:
-        """Parse a price value, handling various formats"""
-        if value is None or value == "null":
+    def _result_from_data(self, data: Dict, strategy: str) -> ChartExtractionResult:
+        """Turn one parsed GPT-4 answer into a result with a confidence score"""
+        result = ChartExtractionResult(
+            stop_loss=self._parse_price(data.get('stop_loss')),
+            take_profit_1=self._parse_price(data.get('take_profit_1')),
+            take_profit_2=self._parse_price(data.get('take_profit_2')),
+            take_profit_3=self._parse_price(data.get('take_profit_3')),
+            entry_price=self._parse_price(data.get('entry_price')),
+            confidence_score=0.85,
+            extraction_method=f"gpt4_vision_{strategy}",
+            raw_extraction=data
+        )
+
+        # Check if we got additional useful data
+        if 'current_price' in data and data['current_price'] and not result.entry_price:
+            result.entry_price = self._parse_price(data['current_price'])
+
+        # Boost confidence if we found multiple price levels
+        found_count = sum([
+            result.stop_loss is not None,
+            result.take_profit_1 is not None,
+            result.take_profit_2 is not None,
+            result.take_profit_3 is not None
+        ])
+
+        if found_count >= 3:
+            result.confidence_score = 0.95
+        elif found_count >= 2:
+            result.confidence_score = 0.85
+        else:
+            result.confidence_score = 0.70
+
+        return result
+
+    def _read_image(self, image_path: str) -> bytes:
+        """Read the chart, failing fast on files the API would reject anyway (size checked before reading)"""
+        size = os.stat(image_path).st_size
+        if size == 0 or size > self.MAX_IMAGE_BYTES:
+            raise ValueError(f"invalid image: {size} bytes (limit {self.MAX_IMAGE_BYTES})")
+
+        with open(image_path, 'rb') as f:
+            raw = f.read()
+
+        self._check_image(raw)
+        return raw
+
+    def _check_image(self, raw: bytes):
+        """Raise ValueError for images the API would reject anyway"""
+        if not raw or len(raw) > self.MAX_IMAGE_BYTES:
+            raise ValueError(f"invalid image: {len(raw)} bytes (limit {self.MAX_IMAGE_BYTES})")
+        if not self._image_mime(raw):
+            raise ValueError(f"invalid image: unsupported format (header {raw[:8]!r})")
+
+    def _get_cached_result(self, cache_key: Tuple[str, str]) -> Optional[ChartExtractionResult]:
+        """Return a fresh copy of a cached extraction, if any"""
+        with self._cache_lock:
+            data = self._result_cache.get(cache_key)
+            if data is None:
+                return None
+            self._result_cache.move_to_end(cache_key)
+        return ChartExtractionResult(**data)
+
+    def _store_cached_result(self, cache_key: Tuple[str, str], result: ChartExtractionResult):
+        """Remember an extraction, evicting the least recently used one when full"""
+        data = asdict(result)
+        with self._cache_lock:
+            self._result_cache[cache_key] = data
+            self._result_cache.move_to_end(cache_key)
+            while len(self._result_cache) > self.cache_size:
+                self._result_cache.popitem(last=False)
+
+        if self.cache_dir:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                self._disk_cache_path(cache_key).write_text(json.dumps(data), encoding="utf-8")
+            except (OSError, TypeError, ValueError) as e:
+                logging.warning(f"Could not write extraction cache: {e}")
+
+    def _disk_cache_path(self, cache_key: Tuple[str, str]) -> Path:
+        """File holding the stored result for one (image hash, direction) under the current prompts"""
+        image_hash, trade_direction = cache_key
+        return self.cache_dir / f"{image_hash}_{trade_direction}_{self.PROMPT_VERSION}.json"
+
+    def _load_disk_result(self, cache_key: Tuple[str, str]) -> Optional[ChartExtractionResult]:
+        """Read a result stored by an earlier run, promoting it into the in-memory LRU"""
+        path = self._disk_cache_path(cache_key)
+        try:
+            data = _json_loads(path.read_bytes())
+            result = ChartExtractionResult(**data)
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache entry {path.name}: {e}")
             return None
 
+        with self._cache_lock:
+            self._result_cache[cache_key] = data
+            while len(self._result_cache) > self.cache_size:
+                self._result_cache.popitem(last=False)
+        return result
+
+    def _get_image_part(self, image_hash: str, raw: bytes) -> Dict:
+        """_build_image_part, memoized by image hash for the last few charts"""
+        with self._cache_lock:
+            image_part = self._image_part_cache.get(image_hash)
+            if image_part is not None:
+                self._image_part_cache.move_to_end(image_hash)
+                return image_part
+
+        # Decode/resize/encode outside the lock so other charts aren't held up
+        image_part = self._build_image_part(raw)
+        with self._cache_lock:
+            self._image_part_cache[image_hash] = image_part
+            while len(self._image_part_cache) > self.IMAGE_PART_CACHE_SIZE:
+                self._image_part_cache.popitem(last=False)
+        return image_part
+
+    @classmethod
+    def _image_mime(cls, raw: bytes) -> Optional[str]:
+        """Mime type from the file header, or None for a format the API doesn't take"""
+        for signature, mime in cls.IMAGE_SIGNATURES:
+            if raw.startswith(signature):
+                return mime
+        # Discord often serves WebP: "RIFF", a 4-byte size, then "WEBP"
+        if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+            return "image/webp"
+        return None
+
+    def _build_image_part(self, raw: bytes) -> Dict:
+        """Shrink the chart to what detail=high uses and build the message part"""
+        # Sniff the real format instead of assuming PNG
+        mime = self._image_mime(raw) or "image/png"
+        detail = "high"
+
+        img = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            # detail=high fits the image into 2048x2048, then scales the short side to 768,
+            # so anything larger is uploaded and billed for nothing
+            height, width = img.shape[:2]
+            scale = min(1.0, self.max_long_side / max(width, height))
+            scale *= min(1.0, self.max_short_side / (min(width, height) * scale))
+            if scale < 1.0:
+                img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                 interpolation=cv2.INTER_AREA)
+
+            ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok and (scale < 1.0 or buf.size < len(raw)):
+                raw, mime = buf.tobytes(), "image/jpeg"
+
+            # A single 512px tile reads small charts just as well as the tiled high mode
+            if max(img.shape[:2]) <= 1024:
+                detail = "low"
+
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{mime};base64,{base64.b64encode(raw).decode('ascii')}",
+                "detail": self.force_detail or detail
+            }
+        }
+
+    def _stream_completion(self, **request) -> str:
+        """Run a streamed completion, retrying rate limits and transient server errors"""
+        for attempt in range(self.MAX_API_ATTEMPTS):
+            try:
+                stream = self.openai_client.chat.completions.create(stream=True, **request)
+                return self._read_json_stream(stream)
+
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.MAX_API_ATTEMPTS - 1:
+                    raise
+                wait = self._retry_delay(e, attempt)
+                logging.warning(f"⏳ GPT-4 API {type(e).__name__}, retrying in {wait:.1f}s "
+                                f"(attempt {attempt + 1}/{self.MAX_API_ATTEMPTS})")
+                time.sleep(wait)
+
+    @staticmethod
+    def _read_json_stream(stream) -> str:
+        """Collect streamed content, hanging up as soon as the top-level JSON object closes"""
+        # Streamed chunks keep the connection busy, so slow replies don't hit proxy idle limits
+        parts = []
+        depth = 0
+        in_string = escaped = False
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                # Notes are free text, so braces inside JSON strings must not count
+                for index, char in enumerate(delta):
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == "\\":
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"':
+                        in_string = True
+                    elif char == "{":
+                        depth += 1
+                    elif char == "}":
+                        depth -= 1
+                        if depth == 0:
+                            parts[-1] = delta[:index + 1]
+                            return "".join(parts).strip()
+        finally:
+            # Also stops generation (and billing) when Ctrl+C or an error lands mid-stream
+            stream.close()
+        return "".join(parts).strip()
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Honour Retry-After when the API sends one, otherwise back off with jitter"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
         try:
-            if isinstance(value, (int, float)):
-                return float(value)
+            return min(60.0, float(retry_after))
+        except (TypeError, ValueError):
+            return random.uniform(2, 4) * (attempt + 1)
 
-            if isinstance(value, str):
-                # Remove common formatting
-                cleaned = value.replace('$', '').replace(',', '').strip()
-                if cleaned and cleaned != 'null':
+    def _parse_price(self, value) -> Optional[float]:
+        """Parse a price value, handling various formats"""
+        value_type = type(value)
+        if value_type is float:
+            return value
+        if value_type is int:
+            return float(value)
+
+        if value_type is str:
+            # Strip "$", thousands separators and whitespace in one pass ("67,234.5" -> "67234.5")
+            cleaned = value.translate(_PRICE_STRIP)
+            if cleaned and cleaned != 'null':
+                try:
                     return float(cleaned)
-        except (ValueError, TypeError):
-            logging.warning(f"Could not parse price value: {value}")
+                except ValueError:
+                    logging.warning(f"Could not parse price value: {value}")
 
         return None
 
@@ -346,86 +829,64 @@ Output as JSON with all found prices:
         Comprehensive validation of extracted prices
         Returns list of validation errors (empty list means valid)
         """
-        errors = []
+        sl = result.stop_loss
+        tp1, tp2, tp3 = result.take_profit_1, result.take_profit_2, result.take_profit_3
 
-        # Check if we have at least minimal data
-        has_any_data = any([
-            result.stop_loss,
-            result.take_profit_1,
-            result.take_profit_2,
-            result.take_profit_3
-        ])
-
-        if not has_any_data:
-            errors.append("No price levels extracted")
-            return errors
+        # Cheapest rejection first
+        if not (sl or tp1 or tp2 or tp3):
+            return ["No price levels extracted"]
 
-        # Collect take profit levels
-        tp_levels = []
-        if result.take_profit_1:
-            tp_levels.append(('TP1', result.take_profit_1))
-        if result.take_profit_2:
-            tp_levels.append(('TP2', result.take_profit_2))
-        if result.take_profit_3:
-            tp_levels.append(('TP3', result.take_profit_3))
-
-        # Validate TP ordering
-        if len(tp_levels) >= 2:
-            for i in range(len(tp_levels) - 1):
-                current_name, current_price = tp_levels[i]
-                next_name, next_price = tp_levels[i + 1]
-
-                if trade_direction == "LONG":
-                    if current_price >= next_price:
-                        errors.append(f"LONG trade: {current_name}({current_price}) should be < {next_name}({next_price})")
-                else:  # SHORT
-                    if current_price <= next_price:
-                        errors.append(f"SHORT trade: {current_name}({current_price}) should be > {next_name}({next_price})")
-
-        # Validate SL position relative to TPs
-        if result.stop_loss and tp_levels:
-            if trade_direction == "LONG":
-                # SL should be below all TPs
-                for tp_name, tp_price in tp_levels:
-                    if result.stop_loss >= tp_price:
-                        errors.append(f"LONG trade: SL({result.stop_loss}) should be < {tp_name}({tp_price})")
-            else:  # SHORT
-                # SL should be above all TPs
-                for tp_name, tp_price in tp_levels:
-                    if result.stop_loss <= tp_price:
-                        errors.append(f"SHORT trade: SL({result.stop_loss}) should be > {tp_name}({tp_price})")
-
-        # Validate entry price if present
-        if result.entry_price and result.stop_loss and tp_levels:
-            if trade_direction == "LONG":
-                # Entry should be between SL and first TP
-                if result.entry_price <= result.stop_loss:
-                    errors.append(f"LONG trade: Entry({result.entry_price}) should be > SL({result.stop_loss})")
-                if tp_levels and result.entry_price >= tp_levels[0][1]:
-                    errors.append(f"LONG trade: Entry({result.entry_price}) should be < TP1({tp_levels[0][1]})")
-            else:  # SHORT
-                # Entry should be between first TP and SL
-                if result.entry_price >= result.stop_loss:
-                    errors.append(f"SHORT trade: Entry({result.entry_price}) should be < SL({result.stop_loss})")
-                if tp_levels and result.entry_price <= tp_levels[0][1]:
-                    errors.append(f"SHORT trade: Entry({result.entry_price}) should be > TP1({tp_levels[0][1]})")
-
-        # Check for unrealistic price differences
-        all_prices = [p for p in [result.stop_loss, result.take_profit_1,
-                                  result.take_profit_2, result.take_profit_3] if p]
-
-        if len(all_prices) >= 2:
-            min_price = min(all_prices)
-            max_price = max(all_prices)
-            price_range = max_price - min_price
-
-            # Check if range is too large (>50% of min price) or too small (<0.1% of min price)
-            if min_price > 0:
-                range_percent = (price_range / min_price) * 100
-                if range_percent > 50:
-                    errors.append(f"Price range seems too large: {range_percent:.1f}% of base price")
-                elif range_percent < 0.1:
-                    errors.append(f"Price range seems too small: {range_percent:.3f}% of base price")
+        errors = []
+        side = "LONG" if trade_direction == "LONG" else "SHORT"
+
+        # Flip SHORT prices so every rule reads "should be increasing"
+        sign = 1.0 if side == "LONG" else -1.0
+        op, rev_op = ("<", ">") if side == "LONG" else (">", "<")
+
+        # Validate TP ordering between neighbouring levels that are present
+        if tp1 and tp2 and sign * tp1 >= sign * tp2:
+            errors.append(f"{side} trade: TP1({tp1}) should be {op} TP2({tp2})")
+        if tp2 and tp3 and sign * tp2 >= sign * tp3:
+            errors.append(f"{side} trade: TP2({tp2}) should be {op} TP3({tp3})")
+        if tp1 and tp3 and not tp2 and sign * tp1 >= sign * tp3:
+            errors.append(f"{side} trade: TP1({tp1}) should be {op} TP3({tp3})")
+
+        # Validate SL position relative to TPs (below them for LONG, above for SHORT)
+        if sl:
+            if tp1 and sign * sl >= sign * tp1:
+                errors.append(f"{side} trade: SL({sl}) should be {op} TP1({tp1})")
+            if tp2 and sign * sl >= sign * tp2:
+                errors.append(f"{side} trade: SL({sl}) should be {op} TP2({tp2})")
+            if tp3 and sign * sl >= sign * tp3:
+                errors.append(f"{side} trade: SL({sl}) should be {op} TP3({tp3})")
+
+        # Validate entry price if present - it should sit between SL and the first TP
+        entry = result.entry_price
+        first_tp = tp1 or tp2 or tp3
+        if entry and sl and first_tp:
+            if sign * entry <= sign * sl:
+                errors.append(f"{side} trade: Entry({entry}) should be {rev_op} SL({sl})")
+            if sign * entry >= sign * first_tp:
+                errors.append(f"{side} trade: Entry({entry}) should be {op} TP1({first_tp})")
+
+        # Check for unrealistic price differences - track min/max in a single scan
+        level_count = 0
+        min_price = max_price = None
+        for price in (sl, tp1, tp2, tp3):
+            if price:
+                level_count += 1
+                if min_price is None or price < min_price:
+                    min_price = price
+                if max_price is None or price > max_price:
+                    max_price = price
+
+        # Check if range is too large (>50% of min price) or too small (<0.1% of min price)
+        if level_count >= 2 and min_price > 0:
+            range_percent = ((max_price - min_price) / min_price) * 100
+            if range_percent > 50:
+                errors.append(f"Price range seems too large: {range_percent:.1f}% of base price")
+            elif range_percent < 0.1:
+                errors.append(f"Price range seems too small: {range_percent:.3f}% of base price")
 
         return errors
 
@@ -454,5 +915,14 @@ Output as JSON with all found prices:
             logging.warning("❌ No prices extracted from chart")
 
 
+# Shared by every extractor so bot restarts don't pile up idle strategy threads. Losing
+# strategies keep running after the race is decided, so every concurrent chart needs a full
+# set of slots or later charts queue behind them; threads are only started when needed
+_STRATEGY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=len(ChartPriceExtractor.PIPELINE_STRATEGIES) * MAX_CONCURRENT_CHARTS,
+    thread_name_prefix="chart-strategy"
+)
+
+
 # Maintain backwards compatibility
 HybridChartExtractor = ChartPriceExtractor
\ No newline at end of file
@@ -7,16 +7,103 @@ Includes timeout handling and better error recovery
 import os
 import json
 import base64
+import hashlib
 import logging
+import random
+import cv2
+import numpy as np
 import openai
 import time
 import asyncio
+import threading
+import weakref
+import importlib.util
+import httpx
 from typing import Optional, List, Dict
-from dataclasses import dataclass, field
-from concurrent.futures import ThreadPoolExecutor
-
-
-@dataclass
+from collections import OrderedDict
+from types import MappingProxyType
+from dataclasses import dataclass, field, asdict
+
+try:
+    from orjson import loads as _json_loads  # C parser; its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as _json_loads
+
+
+# HTTP/2 lets parallel strategy calls share one connection, but needs the h2 package
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# AsyncOpenAI clients shared by every extractor, one per (event loop, API key) -
+# an httpx connection pool cannot be used from a loop other than its own
+_SHARED_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def _get_shared_client(api_key: str) -> openai.AsyncOpenAI:
+    """Return the pooled AsyncOpenAI client for this event loop and API key"""
+    clients = _SHARED_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50)
+        )
+        # Retries are handled by _stream_completion so backoff lives in one place
+        client = openai.AsyncOpenAI(api_key=api_key, max_retries=0, http_client=http_client)
+        clients[api_key] = client
+    return client
+
+
+async def close_shared_clients():
+    """Close the pooled clients of the running event loop (call on shutdown)"""
+    for client in _SHARED_CLIENTS.pop(asyncio.get_running_loop(), {}).values():
+        await client.close()
+
+
+class _TokenBucket:
+    """Async token bucket that refills continuously up to its capacity every period"""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens are available and take them (callers queue in order)"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+
+# Prompt lines tagged "- LONG:" / "- SHORT:" only apply to that trade direction
+def _bake_prompt(prompt: str, trade_direction: str) -> str:
+    """Specialize a strategy prompt for one trade direction, dropping the other side's rules"""
+    own_tag, other_tag = ("- LONG:", "- SHORT:") if trade_direction == "LONG" else ("- SHORT:", "- LONG:")
+    lines = []
+    for line in prompt.splitlines():
+        if line.startswith(other_tag):
+            continue
+        if line.startswith(own_tag):
+            line = "-" + line[len(own_tag):]
+        lines.append(line)
+    lines.append(f"Trade direction: {trade_direction}.")
+    return "\n".join(lines)
+
+
+# Characters dropped from price strings before float()
+_PRICE_STRIP = str.maketrans("", "", "$, \t\n")
+
+
+@dataclass(slots=True)
 class ChartExtractionResult:
     """Result from chart extraction with detailed information"""
     stop_loss: Optional[float] = None
@@ -38,92 +125,89 @@ class AsyncChartPriceExtractor:
 
     # Simplified, more direct prompts for better extraction
     EXTRACTION_STRATEGIES = {
-        "simple_direct": """Look at this trading chart and find ALL visible price numbers.
-
-FIND THESE NUMBERS:
-- Any number that looks like a price (e.g., 67,234.5 or 1.0823)
-- Numbers in RED areas (Stop Loss)
-- Numbers in GREEN areas (Take Profits)
-- Numbers on the right side (price scale)
-- Current price if shown
-
-Return ONLY the prices you can see as JSON:
-{
-  "stop_loss": [number from red area],
-  "take_profit_1": [lowest green area price],
-  "take_profit_2": [middle green area price],
-  "take_profit_3": [highest green area price],
-  "entry_price": [current price or entry],
-  "all_visible_prices": [list all numbers you see]
-}
-
-If you can't see clear prices, return null for those fields.""",
-
-        "color_zones": """Focus ONLY on colored rectangles/boxes in this chart.
-
-STEP 1: Find all RED rectangles
-- What price is shown in or near the red area?
-
-STEP 2: Find all GREEN rectangles
-- List each green box's price from lowest to highest
-
-STEP 3: Find current price
-- Look for arrows, markers, or "current price" labels
-
-Return as JSON:
-{
-  "stop_loss": [price in red zone],
-  "take_profit_1": [first green zone price],
-  "take_profit_2": [second green zone price],
-  "take_profit_3": [third green zone price],
-  "entry_price": [current/entry price]
-}""",
-
-        "text_scan": """Extract ALL text that contains numbers from this chart image.
-
-SCAN FOR:
-1. Any text with numbers
-2. Labels like "TP", "SL", "Entry"
-3. Price axis labels
-4. Numbers inside colored areas
-5. Floating text annotations
-
-List EVERYTHING you find, then organize into:
-{
-  "stop_loss": [SL or red zone price],
-  "take_profit_1": [TP1 or first target],
-  "take_profit_2": [TP2 or second target],
-  "take_profit_3": [TP3 or third target],
-  "entry_price": [entry or current price],
-  "raw_text_found": [all text with numbers]
-}"""
+        "simple_direct": """Find the price numbers on this trading chart.
+- Number in the RED area = stop_loss
+- Numbers in GREEN areas = take_profit_1..3, nearest to entry first
+- Current price or entry marker = entry_price
+- Prices may look like 67,234.5 or 1.0823; copy every digit
+- LONG: stop_loss is below entry and targets rise, TP1 < TP2 < TP3
+- SHORT: stop_loss is above entry and targets fall, TP1 > TP2 > TP3
+
+Return JSON: {"stop_loss": n, "take_profit_1": n, "take_profit_2": n, "take_profit_3": n, "entry_price": n}
+Use null for anything you can't see clearly.""",
+
+        "color_zones": """Read the prices of the colored boxes on this trading chart.
+- RED box = stop_loss
+- GREEN boxes = take_profit_1..3, nearest to entry first
+- Arrow, marker or "current price" label = entry_price
+- LONG: stop_loss is below entry and targets rise, TP1 < TP2 < TP3
+- SHORT: stop_loss is above entry and targets fall, TP1 > TP2 > TP3
+
+Return JSON: {"stop_loss": n, "take_profit_1": n, "take_profit_2": n, "take_profit_3": n, "entry_price": n}
+Use null for anything you can't see clearly.""",
+
+        "text_scan": """Read every text label with a number on this trading chart.
+- "SL" or red-zone price = stop_loss; "TP1/TP2/TP3" or targets = take_profit_1..3
+- "Entry" or current price = entry_price
+- Check the price axis, colored areas and floating annotations
+- LONG: stop_loss is below entry and targets rise, TP1 < TP2 < TP3
+- SHORT: stop_loss is above entry and targets fall, TP1 > TP2 > TP3
+
+Return JSON: {"stop_loss": n, "take_profit_1": n, "take_profit_2": n, "take_profit_3": n, "entry_price": n, "raw_text_found": [up to 10 labels]}
+Use null for anything you can't see clearly."""
     }
 
-    def __init__(self, gpt4_api_key: str = None, max_workers: int = 1):
-        """Initialize with GPT-4 API key and thread pool"""
-        self.openai_client = openai.OpenAI(api_key=gpt4_api_key) if gpt4_api_key else None
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+    # Pre-flight limits checked before any API call
+    MAX_IMAGE_BYTES = 20 * 1024 * 1024
+    IMAGE_SIGNATURES = ((b"\x89PNG", "image/png"), (b"\xff\xd8\xff", "image/jpeg"), (b"GIF8", "image/gif"))
+
+    # Transient failures worth retrying (429, 5xx, timeouts, dropped connections)
+    RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError,
+                        openai.APIConnectionError, openai.InternalServerError)
+    MAX_API_ATTEMPTS = 5
+
+    def __init__(self, gpt4_api_key: str = None, concurrency_limit: int = 3, max_long_side: int = 2048,
+                 max_short_side: int = 768, jpeg_quality: int = 85, cache_size: int = 512,
+                 force_detail: Optional[str] = None, client: Optional[openai.AsyncOpenAI] = None,
+                 requests_per_minute: int = 500, tokens_per_minute: int = 300_000):
+        """Initialize with GPT-4 API key, concurrency/rate limits, upload size limits and cache size"""
+        # Uses the module-wide pooled client unless one is injected
+        self.api_key = gpt4_api_key
+        self._client = client
+        self._semaphore = asyncio.Semaphore(concurrency_limit)
+
+        # Smooth bursts to the account limits instead of bouncing off 429s
+        self._request_bucket = _TokenBucket(requests_per_minute)
+        self._token_bucket = _TokenBucket(tokens_per_minute)
+        self.max_long_side = max_long_side
+        self.max_short_side = max_short_side
+        self.jpeg_quality = jpeg_quality
+        self.force_detail = force_detail  # "low"/"high" to skip the size-based choice
+
+        # Read-only prompt parts per (strategy, direction); only the image is added per call
+        self._msg_templates = MappingProxyType({
+            (strategy, direction): self._build_text_part(strategy, direction)
+            for strategy in self.EXTRACTION_STRATEGIES
+            for direction in ("LONG", "SHORT")
+        })
+
+        # LRU of (image hash, direction) -> asdict(result)
+        self.cache_size = cache_size
+        self._result_cache = OrderedDict()
         logging.info("Async chart extractor initialized")
 
-    async def extract_prices_async(self, image_path: str, trade_direction: str = "LONG") -> ChartExtractionResult:
+    async def extract_prices_async(self, image_path: str, trade_direction: str = "LONG",
+                                   bypass_cache: bool = False) -> ChartExtractionResult:
         """
-        Async wrapper for price extraction that won't block Discord
+        Async price extraction that won't block Discord
 
         Args:
             image_path: Path to chart image
             trade_direction: "LONG" or "SHORT"
+            bypass_cache: Always call the API even if this exact chart was seen before
         """
-        loop = asyncio.get_event_loop()
-
-        # Run extraction in thread pool to avoid blocking
         try:
-            result = await loop.run_in_executor(
-                self.executor,
-                self._extract_prices_sync,
-                image_path,
-                trade_direction
-            )
-            return result
+            return await self._extract_prices_async(image_path, trade_direction, bypass_cache)
         except Exception as e:
             logging.error(f"Async extraction failed: {e}")
             return ChartExtractionResult(
@@ -131,45 +215,59 @@ List EVERYTHING you find, then organize into:
                 extraction_method="failed"
             )
 
-    def _extract_prices_sync(self, image_path: str, trade_direction: str) -> ChartExtractionResult:
-        """Synchronous extraction with timeout handling"""
+    async def _extract_prices_async(self, image_path: str, trade_direction: str,
+                                    bypass_cache: bool = False) -> ChartExtractionResult:
+        """Extraction pipeline with timeout handling"""
         start_time = time.time()
 
         try:
-            if not os.path.exists(image_path):
-                return ChartExtractionResult(error_message="Image file not found")
+            try:
+                raw = await asyncio.to_thread(self._read_image, image_path)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Skipping chart {image_path}: {e}")
+                return ChartExtractionResult(error_message=str(e))
 
-            if not self.openai_client:
+            if not (self._client or self.api_key):
                 return ChartExtractionResult(error_message="No GPT-4 API key")
 
-            # Try simple direct approach first
-            logging.info("Trying simple direct extraction...")
-            result = self._try_strategy(image_path, "simple_direct", timeout=10)
-
-            if result and self._has_data(result):
-                result.validation_passed = True
-                result.processing_time = time.time() - start_time
-                return result
-
-            # Try color zones approach
-            logging.info("Trying color zones extraction...")
-            result = self._try_strategy(image_path, "color_zones", timeout=10)
-
-            if result and self._has_data(result):
-                result.validation_passed = True
-                result.processing_time = time.time() - start_time
-                return result
-
-            # Last resort - text scan
-            logging.info("Trying text scan extraction...")
-            result = self._try_strategy(image_path, "text_scan", timeout=10)
-
+            # Same screenshot + direction means the same answer at temperature 0
+            cache_key = (hashlib.blake2b(raw, digest_size=16).hexdigest(), trade_direction)
+            cached = None if bypass_cache else self._result_cache.get(cache_key)
+            if cached:
+                self._result_cache.move_to_end(cache_key)
+                logging.info("Chart seen before - reusing cached extraction")
+                return ChartExtractionResult(**dict(cached, processing_time=time.time() - start_time))
+
+            # Encode once (off the event loop) and share the same image part across every strategy
+            image_part = await asyncio.to_thread(self._build_image_part, raw)
+
+            # Fire all strategies at once and keep the first one that finds prices
+            logging.info("Running extraction strategies in parallel...")
+            tasks = [
+                asyncio.create_task(self._try_strategy(image_part, strategy, trade_direction, timeout=10))
+                for strategy in self.EXTRACTION_STRATEGIES
+            ]
+            results = {}
+
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    result = await next_done
+                    if result and self._has_data(result):
+                        result.validation_passed = True
+                        result.processing_time = time.time() - start_time
+                        self._store_cached_result(cache_key, result)
+                        return result
+                    if result:
+                        results[result.extraction_method] = result
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            # Nothing had data - report the text scan like the sequential fallback did
+            result = results.get("gpt4_text_scan")
             if result:
                 result.processing_time = time.time() - start_time
-                if self._has_data(result):
-                    result.validation_passed = True
-                else:
-                    result.validation_errors = ["No price data extracted from chart"]
+                result.validation_errors = ["No price data extracted from chart"]
                 return result
 
             return ChartExtractionResult(
@@ -184,43 +282,29 @@ List EVERYTHING you find, then organize into:
                 processing_time=time.time() - start_time
             )
 
-    def _try_strategy(self, image_path: str, strategy: str, timeout: int = 10) -> Optional[ChartExtractionResult]:
+    async def _try_strategy(self, image_part: Dict, strategy: str, trade_direction: str = "LONG",
+                            timeout: int = 10) -> Optional[ChartExtractionResult]:
         """Try a single extraction strategy with timeout"""
         try:
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-
-            prompt = self.EXTRACTION_STRATEGIES.get(strategy, self.EXTRACTION_STRATEGIES["simple_direct"])
+            text_part = self._msg_templates.get((strategy, trade_direction))
+            if text_part is None:
+                text_part = self._build_text_part(strategy, trade_direction)
 
             # Make API call with timeout
-            response = self.openai_client.chat.completions.create(
+            content = await self._stream_completion(
                 model="gpt-4o",
                 messages=[{
                     "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{image_data}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
+                    "content": [text_part, image_part]
                 }],
-                max_tokens=500,
+                max_tokens=150,
                 temperature=0,
+                top_p=0.1,
+                response_format={"type": "json_object"},
                 timeout=timeout
             )
 
-            # Parse response
-            content = response.choices[0].message.content.strip()
-
-            # Clean JSON
-            if '```' in content:
-                content = content.split('```')[1].replace('json', '').strip()
-
-            data = json.loads(content)
+            data = _json_loads(content)
 
             result = ChartExtractionResult(
                 stop_loss=self._parse_price(data.get('stop_loss')),
@@ -251,22 +335,145 @@ List EVERYTHING you find, then organize into:
             logging.warning(f"Strategy {strategy} failed: {e}")
             return None
 
-    def _parse_price(self, value) -> Optional[float]:
-        """Parse various price formats"""
-        if value is None or value == "null":
-            return None
-
+    def _build_text_part(self, strategy: str, trade_direction: str) -> Dict:
+        """Build the prompt message part for one strategy and trade direction"""
+        prompt = self.EXTRACTION_STRATEGIES.get(strategy, self.EXTRACTION_STRATEGIES["simple_direct"])
+        return {"type": "text", "text": _bake_prompt(prompt, trade_direction)}
+
+    async def _stream_completion(self, **request) -> str:
+        """Run a streamed completion, retrying rate limits and transient server errors"""
+        client = self._client or _get_shared_client(self.api_key)
+        estimated_tokens = self._estimate_tokens(request)
+
+        for attempt in range(self.MAX_API_ATTEMPTS):
+            try:
+                await self._request_bucket.acquire()
+                await self._token_bucket.acquire(estimated_tokens)
+
+                async with self._semaphore:
+                    stream = await client.chat.completions.create(stream=True, **request)
+
+                    # Streamed chunks keep the connection busy, so slow replies don't hit proxy idle limits
+                    parts = []
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                    return "".join(parts).strip()
+
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.MAX_API_ATTEMPTS - 1:
+                    raise
+                # Back off outside the semaphore so other calls can use the slot
+                wait = self._retry_delay(e, attempt)
+                logging.warning(f"GPT-4 API {type(e).__name__}, retrying in {wait:.1f}s "
+                                f"(attempt {attempt + 1}/{self.MAX_API_ATTEMPTS})")
+                await asyncio.sleep(wait)
+
+    @staticmethod
+    def _estimate_tokens(request: Dict) -> int:
+        """Rough upper bound of the tokens a request is billed for (prompt + image + reply)"""
+        tokens = request.get("max_tokens", 0)
+        for message in request.get("messages", []):
+            for part in message["content"]:
+                if part["type"] == "text":
+                    tokens += len(part["text"]) // 4
+                elif part["image_url"].get("detail") == "low":
+                    tokens += 85
+                else:
+                    # Largest image we send at detail=high (2048x768) is 8 tiles of 170 + 85 base
+                    tokens += 1445
+        return tokens
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Honour Retry-After when the API sends one, otherwise back off with jitter"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
         try:
-            if isinstance(value, (int, float)):
-                return float(value)
+            return min(60.0, float(retry_after))
+        except (TypeError, ValueError):
+            return random.uniform(2, 4) * (attempt + 1)
+
+    def _read_image(self, image_path: str) -> bytes:
+        """Read the chart, failing fast on files the API would reject anyway"""
+        size = os.stat(image_path).st_size
+        if size == 0 or size > self.MAX_IMAGE_BYTES:
+            raise ValueError(f"invalid image: {size} bytes (limit {self.MAX_IMAGE_BYTES})")
+
+        with open(image_path, 'rb') as f:
+            raw = f.read()
+
+        if not self._image_mime(raw):
+            raise ValueError(f"invalid image: unsupported format (header {raw[:8]!r})")
+        return raw
+
+    def _store_cached_result(self, cache_key: tuple, result: ChartExtractionResult):
+        """Remember an extraction, evicting the least recently used one when full"""
+        self._result_cache[cache_key] = asdict(result)
+        self._result_cache.move_to_end(cache_key)
+        while len(self._result_cache) > self.cache_size:
+            self._result_cache.popitem(last=False)
+
+    @classmethod
+    def _image_mime(cls, raw: bytes) -> Optional[str]:
+        """Mime type from the file header, or None for a format the API doesn't take"""
+        for signature, mime in cls.IMAGE_SIGNATURES:
+            if raw.startswith(signature):
+                return mime
+        # Discord often serves WebP: "RIFF", a 4-byte size, then "WEBP"
+        if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+            return "image/webp"
+        return None
+
+    def _build_image_part(self, raw: bytes) -> Dict:
+        """Shrink the chart to what detail=high uses and build the message part"""
+        # Sniff the real format instead of assuming PNG
+        mime = self._image_mime(raw) or "image/png"
+        detail = "high"
+
+        img = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            # detail=high fits the image into 2048x2048, then scales the short side to 768,
+            # so anything larger is uploaded and billed for nothing
+            height, width = img.shape[:2]
+            scale = min(1.0, self.max_long_side / max(width, height))
+            scale *= min(1.0, self.max_short_side / (min(width, height) * scale))
+            if scale < 1.0:
+                img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                 interpolation=cv2.INTER_AREA)
+
+            ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok and (scale < 1.0 or buf.size < len(raw)):
+                raw, mime = buf.tobytes(), "image/jpeg"
+
+            # A single 512px tile reads small charts just as well as the tiled high mode
+            if max(img.shape[:2]) <= 1024:
+                detail = "low"
+
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{mime};base64,{base64.b64encode(raw).decode('ascii')}",
+                "detail": self.force_detail or detail
+            }
+        }
 
-            if isinstance(value, str):
-                # Handle comma-separated numbers like "67,234.5"
-                cleaned = value.replace('$', '').replace(',', '').strip()
-                if cleaned and cleaned != 'null':
+    def _parse_price(self, value) -> Optional[float]:
+        """Parse various price formats"""
+        value_type = type(value)
+        if value_type is float:
+            return value
+        if value_type is int:
+            return float(value)
+
+        if value_type is str:
+            # Strip "$", thousands separators and whitespace in one pass ("67,234.5" -> "67234.5")
+            cleaned = value.translate(_PRICE_STRIP)
+            if cleaned and cleaned != 'null':
+                try:
                     return float(cleaned)
-        except (ValueError, TypeError):
-            pass
+                except ValueError:
+                    pass
 
         return None
 
@@ -280,9 +487,9 @@ List EVERYTHING you find, then organize into:
             result.entry_price
         ])
 
-    def cleanup(self):
-        """Cleanup thread pool"""
-        self.executor.shutdown(wait=False)
+    async def cleanup(self):
+        """Close the pooled API clients of the running event loop"""
+        await close_shared_clients()
 
 
 # Compatibility wrapper for existing code
@@ -291,10 +498,36 @@ class ChartPriceExtractor:
 
     def __init__(self, gpt4_api_key: str = None):
         self.async_extractor = AsyncChartPriceExtractor(gpt4_api_key)
-
-    def extract_prices(self, image_path: str, trade_direction: str = "LONG") -> ChartExtractionResult:
+        # The AsyncOpenAI connection pool is bound to the loop that first used it,
+        # so all sync calls share one private loop instead of a fresh asyncio.run()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="chart-extractor-loop", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Close the loop's pooled API clients, then stop and close the private loop"""
+        if self._loop.is_closed():
+            return
+        # cleanup() closes the clients of the loop it runs on, so it has to run on ours
+        asyncio.run_coroutine_threadsafe(self.async_extractor.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def extract_prices(self, image_path: str, trade_direction: str = "LONG",
+                       bypass_cache: bool = False) -> ChartExtractionResult:
         """Synchronous extraction for compatibility"""
-        return self.async_extractor._extract_prices_sync(image_path, trade_direction)
+        future = asyncio.run_coroutine_threadsafe(
+            self.async_extractor.extract_prices_async(image_path, trade_direction, bypass_cache),
+            self._loop
+        )
+        return future.result()
 
 
 # Maintain backwards compatibility
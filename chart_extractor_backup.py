@@ -6,14 +6,124 @@ Includes validation and retry logic for improved accuracy
 
 import os
 import json
-import base64
+import asyncio
+import hashlib
 import logging
-import openai
-from typing import Optional
-from dataclasses import dataclass
+import math
+import sqlite3
+import threading
+import weakref
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, List
+from dataclasses import dataclass, asdict, replace
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pybase64 import b64encode  # SIMD encoder, same API as the stdlib one
+except ImportError:
+    from base64 import b64encode
+
+try:
+    from orjson import loads as _json_loads  # C parser; its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as _json_loads
+
+try:
+    from numba import njit  # Optional - compiles the validation kernel for bulk backtests
+except ImportError:
+    def njit(*args, **kwargs):
+        """No numba: run the kernel as plain Python"""
+        return lambda func: func
+
+
+@njit(cache=True)
+def _validate_levels(stop_loss: float, tp1: float, tp2: float, tp3: float, sign: int) -> int:
+    """
+    Price-order check on plain floats (NaN = missing level)
+
+    Prices are multiplied by sign (1 LONG, -1 SHORT) so both directions check for
+    take profits strictly ascending away from the stop loss.
+
+    Returns:
+        0 if valid (or too few levels to tell), -1 if the SL is on the wrong side,
+        k if the k-th and (k+1)-th present take profits are out of order
+    """
+    count = 0 if math.isnan(stop_loss) else 1
+    lowest = math.inf
+    for tp in (tp1, tp2, tp3):
+        if not math.isnan(tp):
+            count += 1
+            lowest = min(lowest, sign * tp)
+    if count < 2:
+        return 0
+
+    if not math.isnan(stop_loss) and lowest < math.inf and sign * stop_loss >= lowest:
+        return -1
+
+    position = 0
+    previous = -math.inf
+    for tp in (tp1, tp2, tp3):
+        if math.isnan(tp):
+            continue
+        position += 1
+        if position > 1 and previous >= sign * tp:
+            return position - 1
+        previous = sign * tp
+    return 0
+
+
+# Structured output schema - the API guarantees replies match it exactly
+_PRICE_LEVEL = {"type": ["number", "null"]}
+PRICE_LEVELS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "stop_loss": _PRICE_LEVEL,
+        "take_profit_1": _PRICE_LEVEL,
+        "take_profit_2": _PRICE_LEVEL,
+        "take_profit_3": _PRICE_LEVEL,
+        "entry_price": _PRICE_LEVEL,
+    },
+    "required": ["stop_loss", "take_profit_1", "take_profit_2", "take_profit_3", "entry_price"],
+    "additionalProperties": False,
+}
+
+
+# Decode/resize/JPEG work, one thread per core (OpenCV releases the GIL) so a batch's
+# preprocessing overlaps with the requests already in flight
+_PREP_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="chart-prep")
+
+# Part of the result cache key - bump whenever SYSTEM_PROMPT, DIRECTION_TEXT, RETRY_WARNING
+# or PRICE_LEVELS_SCHEMA change so stale cached extractions are ignored
+PROMPT_VERSION = "2"
+
+# Fixed instructions sent as the system message - kept byte-identical across calls
+# so OpenAI can serve the prefix from its prompt cache
+SYSTEM_PROMPT = """You read exact price levels from trading chart screenshots.
+
+- Stop loss (SL) = the RED zone/line. Take profits (TP1-TP3) = the GREEN/TEAL zones/lines.
+- Read each level from its label on the right-hand price scale, or the label inside/next to its zone.
+- Copy every digit and decimal exactly - never round or estimate. Similar-looking labels
+  (e.g. 202.22 vs 208.33) are different prices.
+- LONG: SL < TP1 < TP2 < TP3. SHORT: SL > TP1 > TP2 > TP3. If your reading breaks this order, re-read.
+- Use null for any level that isn't on the chart."""
+
+# Per-call user text - the only thing besides the image that varies by request
+DIRECTION_TEXT = {
+    "LONG": "Trade direction: LONG (take profits ascending, stop loss below them).",
+    "SHORT": "Trade direction: SHORT (take profits descending, stop loss above them).",
+}
+
+# Prepended to the user message when a previous attempt failed validation
+RETRY_WARNING = """⚠️ Your previous reading FAILED validation - the prices were not in logical order.
+Re-read every label digit by digit (0 vs 8, 1 vs 7, 2 vs 8) and don't read the same label twice.
+
+"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ChartExtractionResult:
     """Result from chart extraction"""
     stop_loss: Optional[float] = None
@@ -28,72 +138,86 @@ class ChartExtractionResult:
 class ChartPriceExtractor:
     """Simplified chart extractor using only GPT-4 Vision with validation"""
 
-    def __init__(self, gpt4_api_key: str = None):
-        """Initialize with GPT-4 API key"""
-        self.openai_client = openai.OpenAI(api_key=gpt4_api_key) if gpt4_api_key else None
-        logging.info("Chart extractor initialized with GPT-4 Vision")
+    def __init__(self, gpt4_api_key: str = None, max_long_side: int = 1536, jpeg_quality: int = 90,
+                 concurrency_limit: int = 5, speculative: bool = False,
+                 cache_path: Optional[str] = ".cache/backup_chart_results.db", crop_price_region: bool = True):
+        """
+        Initialize with GPT-4 API key
+
+        Args:
+            gpt4_api_key: OpenAI API key
+            max_long_side: Charts are downscaled so their longest side fits this many pixels
+            jpeg_quality: JPEG quality used for the uploaded chart
+            concurrency_limit: Max GPT-4 requests in flight at once (keeps under the RPM/TPM limits)
+            speculative: Send the normal and the strict retry prompt at once on the first
+                attempt and keep whichever validates first (2x tokens, no serial retry wait)
+            cache_path: SQLite file caching validated results per chart (None disables it)
+            crop_price_region: Crop to the red/green zones plus the price scale before upload
+        """
+        self.api_key = gpt4_api_key
+        self.concurrency_limit = concurrency_limit
+        self.speculative = speculative
+        # AsyncOpenAI connections and semaphores belong to one event loop, and the sync
+        # wrapper starts a fresh loop per call - so keep one client per loop
+        self._loop_clients = weakref.WeakKeyDictionary()
+        self.max_long_side = max_long_side
+        self.jpeg_quality = jpeg_quality
+        self.crop_price_region = crop_price_region
+
+        # Validated results keyed by image hash, so re-running a chart costs no API call
+        self._cache_db = None
+        self._cache_lock = threading.Lock()
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            self._cache_db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._cache_db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+            self._cache_db.commit()
+        logger.info("Chart extractor initialized with GPT-4 Vision")
 
     def _validate_extraction(self, result: ChartExtractionResult, trade_direction: str = "LONG") -> bool:
         """
         Validate extraction makes logical sense for trading
         Returns True if valid, False if something is wrong
         """
-        prices = []
-
-        # Collect all extracted prices
-        if result.stop_loss:
-            prices.append(('SL', result.stop_loss))
-        if result.take_profit_1:
-            prices.append(('TP1', result.take_profit_1))
-        if result.take_profit_2:
-            prices.append(('TP2', result.take_profit_2))
-        if result.take_profit_3:
-            prices.append(('TP3', result.take_profit_3))
-
-        if len(prices) < 2:
-            return True  # Not enough data to validate
-
-        # For LONG: SL should be lowest, TPs should increase
-        # For SHORT: SL should be highest, TPs should decrease
-
-        # Simple check: are TPs in order?
-        tp_prices = []
-        if result.take_profit_1:
-            tp_prices.append(result.take_profit_1)
-        if result.take_profit_2:
-            tp_prices.append(result.take_profit_2)
-        if result.take_profit_3:
-            tp_prices.append(result.take_profit_3)
-
-        if len(tp_prices) >= 2:
-            # Check if TPs are in ascending order (for LONG)
-            if trade_direction == "LONG":
-                for i in range(len(tp_prices) - 1):
-                    if tp_prices[i] >= tp_prices[i + 1]:
-                        logging.warning(f"❌ TP order invalid for LONG: TP{i+1}={tp_prices[i]} >= TP{i+2}={tp_prices[i+1]}")
-                        return False
-            # Check if TPs are in descending order (for SHORT)
-            else:
-                for i in range(len(tp_prices) - 1):
-                    if tp_prices[i] <= tp_prices[i + 1]:
-                        logging.warning(f"❌ TP order invalid for SHORT: TP{i+1}={tp_prices[i]} <= TP{i+2}={tp_prices[i+1]}")
-                        return False
-
-        # Check if SL is on correct side
-        if result.stop_loss and tp_prices:
-            if trade_direction == "LONG":
-                if result.stop_loss >= min(tp_prices):
-                    logging.warning(f"❌ SL={result.stop_loss} >= TP for LONG trade")
-                    return False
-            else:
-                if result.stop_loss <= max(tp_prices):
-                    logging.warning(f"❌ SL={result.stop_loss} <= TP for SHORT trade")
-                    return False
-
-        logging.info("✅ Extraction passed validation")
-        return True
+        # 0/None both mean "not extracted"
+        sign = 1 if trade_direction == "LONG" else -1
+        code = _validate_levels(float(result.stop_loss or math.nan), float(result.take_profit_1 or math.nan),
+                                float(result.take_profit_2 or math.nan), float(result.take_profit_3 or math.nan),
+                                sign)
+        if code == 0:
+            levels = (result.stop_loss, result.take_profit_1, result.take_profit_2, result.take_profit_3)
+            if sum(1 for level in levels if level) >= 2:
+                logger.info("✅ Extraction passed validation")
+            return True
+
+        op, direction = (">=", "LONG") if sign == 1 else ("<=", "SHORT")
+        if code < 0:
+            logger.warning("❌ SL=%s %s TP for %s trade", result.stop_loss, op, direction)
+        else:
+            tp_prices = [tp for tp in (result.take_profit_1, result.take_profit_2, result.take_profit_3) if tp]
+            logger.warning("❌ TP order invalid for %s: TP%d=%s %s TP%d=%s",
+                           direction, code, tp_prices[code - 1], op, code + 1, tp_prices[code])
+        return False
 
     def extract_prices(self, image_path: str, trade_direction: str = "LONG", max_retries: int = 2) -> ChartExtractionResult:
+        """Blocking wrapper around extract_prices_async for existing callers"""
+        return asyncio.run(self._run_and_close(self.extract_prices_async(image_path, trade_direction, max_retries)))
+
+    def extract_many(self, image_paths: List[str], trade_direction: str = "LONG",
+                     max_retries: int = 2) -> List[ChartExtractionResult]:
+        """Blocking wrapper around extract_many_async"""
+        return asyncio.run(self._run_and_close(self.extract_many_async(image_paths, trade_direction, max_retries)))
+
+    async def extract_many_async(self, image_paths: List[str], trade_direction: str = "LONG",
+                                 max_retries: int = 2) -> List[ChartExtractionResult]:
+        """Extract several charts concurrently (bounded by concurrency_limit), results in input order"""
+        return await asyncio.gather(*[
+            self.extract_prices_async(path, trade_direction, max_retries) for path in image_paths
+        ])
+
+    async def extract_prices_async(self, image_path: str, trade_direction: str = "LONG",
+                                   max_retries: int = 2) -> ChartExtractionResult:
         """
         Main extraction pipeline - uses GPT-4 Vision with validation and retry
 
@@ -103,185 +227,247 @@ class ChartPriceExtractor:
             max_retries: Number of retry attempts if validation fails
         """
         try:
-            # Load image to verify it exists
-            if not os.path.exists(image_path):
-                logging.error(f"Image file not found: {image_path}")
+            try:
+                raw = await asyncio.to_thread(self._read_file, image_path)
+            except OSError as e:
+                logger.error("Image file not readable: %s (%s)", image_path, e)
                 return ChartExtractionResult()
 
             # Use GPT-4 Vision with validation
-            if self.openai_client:
-                for attempt in range(max_retries + 1):
+            if self.api_key:
+                cache_key = f"{hashlib.sha256(raw).hexdigest()}:{PROMPT_VERSION}:{trade_direction}"
+                cached = await asyncio.to_thread(self._cache_get, cache_key)
+                if cached:
+                    logger.info("♻️ Chart seen before - using cached extraction")
+                    return cached
+
+                # Shrink and encode once - every retry sends the same image
+                try:
+                    image_data, mime, detail = await asyncio.get_running_loop().run_in_executor(
+                        _PREP_EXECUTOR, self._prepare_image, raw)
+                except ValueError as e:
+                    # Corrupt or non-image file - don't waste a round trip on it
+                    logger.error("Skipping %s: %s", image_path, e)
+                    return ChartExtractionResult()
+                image_part = {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{mime};base64,{b64encode(image_data).decode('ascii')}",
+                        "detail": detail
+                    }
+                }
+
+                first_attempt = 0
+                if self.speculative and max_retries > 0:
+                    result, passed = await self._speculative_extract(image_part, trade_direction)
+                    if passed:
+                        await asyncio.to_thread(self._cache_put, cache_key, result)
+                        return result
+                    first_attempt = 2
+                    if first_attempt > max_retries:
+                        logger.error("❌ All %d attempts failed validation", max_retries + 1)
+                        return replace(result, confidence_score=0.5)
+
+                for attempt in range(first_attempt, max_retries + 1):
                     if attempt > 0:
-                        logging.warning(f"🔄 Retry attempt {attempt}/{max_retries} - Previous extraction failed validation")
+                        logger.warning("🔄 Retry attempt %d/%d - Previous extraction failed validation", attempt, max_retries)
 
-                    logging.info("🤖 Using GPT-4 Vision to extract prices...")
-                    result = self._gpt4_vision_extract(image_path, retry_attempt=attempt)
+                    logger.info("🤖 Using GPT-4 Vision to extract prices...")
+                    result = await self._gpt4_vision_extract(image_part, trade_direction, retry_attempt=attempt)
 
                     # Validate the result
                     if self._validate_extraction(result, trade_direction):
                         if attempt > 0:
-                            logging.info(f"✅ Retry successful on attempt {attempt}")
+                            logger.info("✅ Retry successful on attempt %d", attempt)
+                        await asyncio.to_thread(self._cache_put, cache_key, result)
                         return result
                     else:
                         if attempt < max_retries:
-                            logging.warning(f"⚠️ Extraction failed validation, retrying...")
+                            logger.warning("⚠️ Extraction failed validation, retrying...")
                         else:
-                            logging.error(f"❌ All {max_retries + 1} attempts failed validation")
+                            logger.error("❌ All %d attempts failed validation", max_retries + 1)
                             # Return the result anyway but with lower confidence
-                            result.confidence_score = 0.5
-                            return result
+                            return replace(result, confidence_score=0.5)
 
                 return result
             else:
-                logging.error("❌ No GPT-4 API key provided!")
+                logger.error("❌ No GPT-4 API key provided!")
                 return ChartExtractionResult()
 
         except Exception as e:
-            error_msg = str(e).encode('ascii', errors='ignore').decode('ascii')
-            logging.error(f"Extraction failed: {error_msg}", exc_info=True)
+            # The bots already reconfigure their streams with errors='replace', and a
+            # traceback per failure adds up in an outage - keep it for debug logging
+            logger.error("Extraction failed: %s", e)
+            logger.debug("Extraction failure traceback", exc_info=True)
             return ChartExtractionResult()
 
-    def _gpt4_vision_extract(self, image_path: str, retry_attempt: int = 0) -> ChartExtractionResult:
+    def _cache_get(self, key: str) -> Optional[ChartExtractionResult]:
+        """Look up a previously validated result"""
+        if self._cache_db is None:
+            return None
+        with self._cache_lock:
+            row = self._cache_db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        return ChartExtractionResult(**_json_loads(row[0])) if row else None
+
+    def _cache_put(self, key: str, result: ChartExtractionResult):
+        """Store a validated result (only when there were enough prices to actually validate)"""
+        if self._cache_db is None:
+            return
+        levels = (result.stop_loss, result.take_profit_1, result.take_profit_2, result.take_profit_3)
+        if sum(1 for level in levels if level) < 2:
+            return
+        with self._cache_lock:
+            self._cache_db.execute("INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)",
+                                   (key, json.dumps(asdict(result))))
+            self._cache_db.commit()
+
+    async def _speculative_extract(self, image_part: dict,
+                                   trade_direction: str) -> Tuple[ChartExtractionResult, bool]:
         """
-        Extract prices using GPT-4 Vision API
+        Run the first attempt and the first retry prompt in parallel
 
-        Args:
-            image_path: Path to the chart image
-            retry_attempt: Number of retry attempts (enhances prompt strictness)
+        Returns the first result that passes validation, or the plain attempt's
+        result with False if neither does.
         """
+        logger.info("🤖 Using GPT-4 Vision to extract prices (speculative x2)...")
+        tasks = [asyncio.create_task(self._gpt4_vision_extract(image_part, trade_direction, retry_attempt=attempt))
+                 for attempt in (0, 1)]
         try:
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-
-            # Add extra warning if this is a retry
-            retry_warning = ""
-            if retry_attempt > 0:
-                retry_warning = """
-⚠️⚠️⚠️ CRITICAL ALERT ⚠️⚠️⚠️
-Previous extraction attempt FAILED validation!
-The prices were NOT in logical order - you made a reading error.
-
-Common mistakes to avoid:
-- Confusing 202.22 with 208.33 (middle digit: 0 vs 8)
-- Confusing 197.63 with 191.63 (second digit: 9 vs 1)
-- Reading the same label twice
-- Estimating instead of reading exact digits
-
-BE EXTRA CAREFUL THIS TIME:
-- Read each digit individually
-- Verify the middle digits carefully (0 vs 8, 1 vs 7)
-- Double-check your work before responding
-- Make sure prices are in logical order
-
-"""
-
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": retry_warning + """You are a professional trading chart analyzer. Your task is to extract EXACT price levels from this trading chart with PERFECT decimal precision.
-
-=== STEP 1: IDENTIFY THE KEY ELEMENTS ===
-Look for:
-- RED zones/lines = Stop Loss level
-- GREEN/TEAL zones/lines = Take Profit levels (usually 3)
-- Price scale on the RIGHT side of the chart
-- Horizontal lines crossing through colored zones
-
-=== STEP 2: LOCATE PRICE LABELS ===
-Price labels appear where:
-- Horizontal lines meet the RIGHT edge
-- Inside or next to colored zones
-- On the price axis (right side)
-
-=== STEP 3: EXTRACT STOP LOSS ===
-Find the RED zone/line:
-- Read the EXACT price where the red horizontal line meets the price scale
-- This is the Stop Loss (SL)
-- Be precise with decimals
-
-=== STEP 4: EXTRACT TAKE PROFITS ===
-Find ALL GREEN/TEAL zones:
-- There are usually 3 Take Profit levels (TP1, TP2, TP3)
-- Read EXACT prices where green lines meet the price scale
-- Order them correctly:
-  - For LONG: TP1 < TP2 < TP3 (ascending)
-  - For SHORT: TP1 > TP2 > TP3 (descending)
-
-=== STEP 5: PRECISION VERIFICATION ===
-For each price:
-- Read every single digit carefully
-- Don't round or estimate
-- If you see 194.46, write exactly 194.46
-- If you see 208.33, write exactly 208.33, NOT 202.22
-
-=== STEP 6: COMMON MISTAKES TO AVOID ===
-- DO NOT confuse similar-looking numbers
-- 202.22 and 208.33 are DIFFERENT (check middle digit)
-- 197.63 and 191.63 are DIFFERENT (check second digit)
-- Always verify decimal places
-
-=== STEP 7: FINAL QUALITY CHECK ===
-Before outputting:
-- Verify all prices are realistic (no negative, no extreme values)
-- Check logical relationships (SL should be below TPs for long, above for short)
-- Ensure you found at least SL and TP1
-
-=== STEP 8: HANDLE SIMILAR-LOOKING NUMBERS ===
-CRITICAL: When you see multiple prices close together (like 200.93, 202.22, 208.33):
-- These are DIFFERENT numbers despite looking similar
-- Do NOT confuse 202 with 208 - they differ by 6 points
-- Read each digit individually: 2-0-8 is NOT the same as 2-0-2
-- Verify by checking the middle digit: is it a 0 or an 8?
-- If prices seem too close together (within 2 points), re-examine carefully
-
-=== STEP 9: VERIFY LOGICAL ORDER ===
-Before outputting, verify:
-- For LONG trades: prices should INCREASE (SL → TP1 → TP2 → TP3)
-- For SHORT trades: prices should DECREASE (TP1 → TP2 → TP3 → SL)
-- If order is wrong, you made a reading error - GO BACK AND FIX IT
-
-=== STEP 10: OUTPUT FORMAT ===
-Return ONLY valid JSON with exact prices:
-{
-  "stop_loss": 194.46,
-  "take_profit_1": 197.63,
-  "take_profit_2": 200.93,
-  "take_profit_3": 208.33,
-  "entry_price": null
-}
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if self._validate_extraction(result, trade_direction):
+                    return result, True
+            logger.warning("⚠️ Both speculative extractions failed validation")
+            return tasks[0].result(), False
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_and_close(self, coro):
+        """Run coro, then close the client tied to this (about to be discarded) event loop"""
+        try:
+            return await coro
+        finally:
+            state = self._loop_clients.pop(asyncio.get_running_loop(), None)
+            if state:
+                await state[0].close()
+
+    def _loop_state(self) -> Tuple["openai.AsyncOpenAI", asyncio.Semaphore]:
+        """Client and concurrency semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        state = self._loop_clients.get(loop)
+        if state is None:
+            # Imported on first API call - openai pulls in httpx/pydantic/anyio, which
+            # validation-only users of this module never need
+            import openai
+            state = (openai.AsyncOpenAI(api_key=self.api_key), asyncio.Semaphore(self.concurrency_limit))
+            self._loop_clients[loop] = state
+        return state
+
+    @staticmethod
+    def _read_file(image_path: str) -> bytes:
+        """Read the raw chart bytes (run in a worker thread)"""
+        with open(image_path, 'rb') as f:
+            return f.read()
+
+    def _prepare_image(self, raw: bytes) -> Tuple[bytes, str, str]:
+        """
+        Decode, downscale and re-encode the chart as JPEG
 
-Use null for any level that doesn't exist.
-BE EXACT WITH EVERY DECIMAL - ONE MISTAKE COSTS THOUSANDS!"""
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{image_data}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
-                }],
-                max_tokens=300,
-                temperature=0
-            )
+        Returns:
+            (image bytes, mime type, vision detail level)
 
-            # Parse response
-            content = response.choices[0].message.content.strip()
+        Raises:
+            ValueError: if the file is not a decodable image
+        """
+        # IMREAD_COLOR also drops any alpha channel
+        img = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("not a valid PNG/JPEG image")
+
+        if self.crop_price_region:
+            img = self._crop_price_region(img)
+
+        height, width = img.shape[:2]
+        scale = self.max_long_side / max(width, height)
+        if scale < 1.0:
+            img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return raw, "image/png", "high"
+
+        # Small charts read fine from a single low-detail tile
+        detail = "high" if max(img.shape[:2]) > 1024 else "low"
+        return buf.tobytes(), "image/jpeg", detail
+
+    @staticmethod
+    def _crop_price_region(img: np.ndarray) -> np.ndarray:
+        """
+        Crop to the colored SL/TP zones, extended right to include the price scale
 
-            # Remove markdown if present
-            if content.startswith('```'):
-                content = content.split('```')[1]
-                if content.startswith('json'):
-                    content = content[4:]
-                content = content.strip()
+        Returns the full image when no zone stands out or the crop would barely help.
+        """
+        height, width = img.shape[:2]
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+
+        # Red wraps around hue 0; green/teal spans roughly 35-100 on OpenCV's 0-180 scale
+        red = cv2.inRange(hsv, (0, 60, 60), (10, 255, 255)) | cv2.inRange(hsv, (170, 60, 60), (180, 255, 255))
+        green = cv2.inRange(hsv, (35, 60, 60), (100, 255, 255))
+        mask = red | green
+
+        # Ignore stray colored pixels (candles, icons) - zones cover a real share of the chart
+        if cv2.countNonZero(mask) < height * width * 0.005:
+            return img
+
+        x, y, w, h = cv2.boundingRect(mask)
+        pad_x, pad_y = width // 20, height // 20
+        left = max(0, x - pad_x)
+        top, bottom = max(0, y - pad_y), min(height, y + h + pad_y)
+
+        # Labels sit on the right-hand axis, so always keep everything up to the right edge
+        if (width - left) * (bottom - top) > height * width * 0.9:
+            return img
+        return img[top:bottom, left:]
+
+    async def _gpt4_vision_extract(self, image_part: dict, trade_direction: str = "LONG",
+                                   retry_attempt: int = 0) -> ChartExtractionResult:
+        """
+        Extract prices using GPT-4 Vision API
 
-            # Parse JSON
-            data = json.loads(content)
+        Args:
+            image_part: image_url message part holding the prepared chart
+            trade_direction: "LONG" or "SHORT", tells the model which way the levels run
+            retry_attempt: Number of retry attempts (enhances prompt strictness)
+        """
+        try:
+            # Only the direction, retry warning and image vary between calls
+            text = DIRECTION_TEXT["LONG" if trade_direction == "LONG" else "SHORT"]
+            if retry_attempt > 0:
+                text = RETRY_WARNING + text
+            user_content = [{"type": "text", "text": text}, image_part]
+
+            client, semaphore = self._loop_state()
+            async with semaphore:
+                stream = await client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": user_content}
+                    ],
+                    max_tokens=300,
+                    temperature=0,
+                    response_format={
+                        "type": "json_schema",
+                        "json_schema": {"name": "price_levels", "schema": PRICE_LEVELS_SCHEMA, "strict": True}
+                    },
+                    stream=True
+                )
+                content = await self._read_json_stream(stream)
+
+            # Structured output - always a bare JSON object matching the schema
+            data = _json_loads(content)
 
             result = ChartExtractionResult(
                 stop_loss=data.get('stop_loss'),
@@ -295,9 +481,30 @@ BE EXACT WITH EVERY DECIMAL - ONE MISTAKE COSTS THOUSANDS!"""
             return result
 
         except Exception as e:
-            logging.error(f"GPT-4 extraction failed: {e}")
+            logger.error("GPT-4 extraction failed: %s", e)
             return ChartExtractionResult()
 
+    @staticmethod
+    async def _read_json_stream(stream) -> str:
+        """Collect streamed content, hanging up as soon as the JSON object closes"""
+        parts = []
+        depth = 0
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                # The schema only has number/null values, so braces never appear inside strings
+                depth += delta.count("{") - delta.count("}")
+                if depth <= 0 and "}" in delta:
+                    break
+        finally:
+            await stream.close()
+        return "".join(parts)
+
 
 # Backwards compatibility - keep the old name
 HybridChartExtractor = ChartPriceExtractor
\ No newline at end of file
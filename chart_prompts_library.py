@@ -4,6 +4,9 @@ Library of specialized prompts for different chart extraction scenarios
 These can be used to enhance the chart_extractor.py for specific chart types
 """
 
+from functools import lru_cache
+from string import Template
+
 # Collection of specialized prompts for different scenarios
 
 PROMPT_TEMPLATES = {
@@ -105,10 +108,10 @@ Return zones with their associated price values.""",
     "double_check": """Verify the extracted price levels from this trading chart.
 
 PREVIOUSLY EXTRACTED:
-Stop Loss: {stop_loss}
-TP1: {take_profit_1}
-TP2: {take_profit_2}
-TP3: {take_profit_3}
+Stop Loss: $stop_loss
+TP1: $take_profit_1
+TP2: $take_profit_2
+TP3: $take_profit_3
 
 VERIFICATION TASKS:
 1. Confirm these prices are visible on the chart
@@ -243,27 +246,40 @@ Extract prices with confidence levels for each."""
 }
 
 
+# Used for scenarios that have no dedicated prompt
+DEFAULT_SCENARIO = "trading_view_style"
+
+# Parsed once at import; placeholders use $name so the JSON braces in prompts need no escaping
+_COMPILED_TEMPLATES = {name: Template(prompt) for name, prompt in PROMPT_TEMPLATES.items()}
+
+
+@lru_cache(maxsize=256)
+def _render_prompt(scenario: str, values: frozenset) -> str:
+    """Fill a compiled template - cached since the same prices get re-verified often"""
+    template = _COMPILED_TEMPLATES.get(scenario, _COMPILED_TEMPLATES[DEFAULT_SCENARIO])
+    return template.safe_substitute(dict(values))
+
+
 def get_prompt_for_scenario(scenario: str, **kwargs) -> str:
     """
     Get appropriate prompt for specific scenario
 
     Args:
         scenario: Type of chart or extraction scenario
-        **kwargs: Variables to format into prompt
+        **kwargs: Variables to format into prompt (missing ones are left as-is)
 
     Returns:
         Formatted prompt string
     """
-    prompt = PROMPT_TEMPLATES.get(scenario, PROMPT_TEMPLATES["comprehensive"])
+    if not kwargs:
+        return PROMPT_TEMPLATES.get(scenario, PROMPT_TEMPLATES[DEFAULT_SCENARIO])
 
-    # Format prompt with any provided values
-    if kwargs:
-        try:
-            prompt = prompt.format(**kwargs)
-        except KeyError:
-            pass  # Ignore missing keys
-
-    return prompt
+    try:
+        return _render_prompt(scenario, frozenset(kwargs.items()))
+    except TypeError:
+        # Unhashable values can't be cached
+        template = _COMPILED_TEMPLATES.get(scenario, _COMPILED_TEMPLATES[DEFAULT_SCENARIO])
+        return template.safe_substitute(kwargs)
 
 
 # Validation rules for different asset types
@@ -309,18 +325,25 @@ def validate_by_asset_type(prices: dict, asset_type: str = "crypto") -> list:
     warnings = []
     rules = VALIDATION_RULES.get(asset_type, VALIDATION_RULES["crypto"])
 
-    # Check if prices exist
-    price_values = [v for v in prices.values() if v is not None]
-    if len(price_values) < 2:
+    # One pass: count the prices and track the range
+    count = 0
+    min_price = max_price = None
+    for value in prices.values():
+        if value is None:
+            continue
+        count += 1
+        if min_price is None:
+            min_price = max_price = value
+        elif value < min_price:
+            min_price = value
+        elif value > max_price:
+            max_price = value
+
+    if count < 2:
         return ["Insufficient price data for validation"]
 
-    # Calculate range
-    min_price = min(price_values)
-    max_price = max(price_values)
-    price_range = max_price - min_price
-
     if min_price > 0:
-        range_percent = (price_range / min_price) * 100
+        range_percent = ((max_price - min_price) / min_price) * 100
 
         # Check if range is reasonable
         if range_percent > rules["max_range_percent"]:
@@ -329,9 +352,12 @@ def validate_by_asset_type(prices: dict, asset_type: str = "crypto") -> list:
             warnings.append(f"Price range ({range_percent:.3f}%) seems too small for {asset_type}")
 
     # Check risk:reward ratio if we have SL and TP
-    if prices.get('stop_loss') and prices.get('take_profit_1') and prices.get('entry_price'):
-        risk = abs(prices['entry_price'] - prices['stop_loss'])
-        reward = abs(prices['take_profit_1'] - prices['entry_price'])
+    stop_loss = prices.get('stop_loss')
+    take_profit_1 = prices.get('take_profit_1')
+    entry_price = prices.get('entry_price')
+    if stop_loss and take_profit_1 and entry_price:
+        risk = abs(entry_price - stop_loss)
+        reward = abs(take_profit_1 - entry_price)
 
         if risk > 0:
             rr_ratio = reward / risk
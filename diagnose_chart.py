@@ -4,178 +4,56 @@ Diagnostic tool to test chart extraction and identify issues
 Helps understand why extraction might be failing
 """
 
+import os
 import sys
 import json
+import heapq
 import base64
+import asyncio
+import cv2
+import numpy as np
 import openai
 from pathlib import Path
+from typing import Optional, Tuple
+from fine_tune_extraction import cached_extract
 
+try:
+    from orjson import loads as _json_loads  # C parser; its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as _json_loads
 
-def diagnose_chart(image_path: str, api_key: str):
-    """Diagnose why chart extraction might be failing"""
 
-    print("=" * 60)
-    print("CHART EXTRACTION DIAGNOSTIC")
-    print("=" * 60)
-
-    # Check file exists
-    if not Path(image_path).exists():
-        print(f"❌ ERROR: File not found: {image_path}")
-        return
-
-    file_size = Path(image_path).stat().st_size / 1024  # KB
-    print(f"✅ File found: {image_path}")
-    print(f"📊 File size: {file_size:.1f} KB")
-
-    # Initialize OpenAI
-    client = openai.OpenAI(api_key=api_key)
-
-    # Load image
-    with open(image_path, 'rb') as f:
-        image_data = base64.b64encode(f.read()).decode('utf-8')
-
-    print("\n" + "=" * 60)
-    print("RUNNING DIAGNOSTIC QUERIES...")
-    print("=" * 60)
-
-    # Test 1: Basic description
-    print("\n1️⃣ BASIC IMAGE DESCRIPTION")
-    print("-" * 30)
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": "Describe what you see in this image in 2-3 sentences."},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_data}", "detail": "high"}}
-                ]
-            }],
-            max_tokens=200
-        )
-        description = response.choices[0].message.content
-        print(f"Description: {description}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return
-
-    # Test 2: Color detection
-    print("\n2️⃣ COLOR DETECTION")
-    print("-" * 30)
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": """List all colored rectangles, boxes, or zones you see:
+# (key, section heading, result label, question, max_tokens, model, detail) for each diagnostic;
+# model/detail apply in --separate mode - questions that don't read small digits get the cheap model
+DIAGNOSTIC_QUERIES = (
+    ("description", "1️⃣ BASIC IMAGE DESCRIPTION", "Description",
+     "Describe what you see in this image in 2-3 sentences.", 200, "gpt-4o-mini", "low"),
+    ("colors", "2️⃣ COLOR DETECTION", "Colored zones", """List all colored rectangles, boxes, or zones you see:
 - Red areas (location and what's inside)
 - Green areas (location and what's inside)
 - Any other colored zones
 
-Be specific about what text or numbers appear in each colored area."""},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_data}", "detail": "high"}}
-                ]
-            }],
-            max_tokens=300
-        )
-        colors = response.choices[0].message.content
-        print(f"Colored zones: {colors}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-
-    # Test 3: Number detection
-    print("\n3️⃣ NUMBER DETECTION")
-    print("-" * 30)
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": """List ALL numbers you can see in this image:
+Be specific about what text or numbers appear in each colored area.""", 300, "gpt-4o", "high"),
+    ("numbers", "3️⃣ NUMBER DETECTION", "Numbers found", """List ALL numbers you can see in this image:
 - Any price-like numbers (e.g., 67,234.50 or 1.0823)
 - Numbers on axes
 - Numbers in colored areas
 - Any other visible numbers
 
-List them exactly as they appear."""},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_data}", "detail": "high"}}
-                ]
-            }],
-            max_tokens=400
-        )
-        numbers = response.choices[0].message.content
-        print(f"Numbers found: {numbers}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-
-    # Test 4: Text detection
-    print("\n4️⃣ TEXT LABELS DETECTION")
-    print("-" * 30)
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": """List any text labels or annotations you see:
+List them exactly as they appear.""", 400, "gpt-4o", "high"),
+    ("text", "4️⃣ TEXT LABELS DETECTION", "Text found", """List any text labels or annotations you see:
 - Labels like "TP1", "TP2", "SL", "Entry"
 - Any text near lines or boxes
 - Axis labels
 - Any other readable text
 
-Quote the exact text you see."""},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_data}", "detail": "high"}}
-                ]
-            }],
-            max_tokens=300
-        )
-        text = response.choices[0].message.content
-        print(f"Text found: {text}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-
-    # Test 5: Chart type identification
-    print("\n5️⃣ CHART TYPE IDENTIFICATION")
-    print("-" * 30)
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": """What type of chart is this?
+Quote the exact text you see.""", 300, "gpt-4o", "high"),
+    ("chart_type", "5️⃣ CHART TYPE IDENTIFICATION", "Chart type", """What type of chart is this?
 - Is it a trading chart (candlestick, line chart)?
 - What platform does it appear to be from (TradingView, MT4, etc.)?
 - Are there price levels marked?
-- Can you see a price scale/axis?"""},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_data}", "detail": "high"}}
-                ]
-            }],
-            max_tokens=200
-        )
-        chart_type = response.choices[0].message.content
-        print(f"Chart type: {chart_type}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-
-    # Test 6: Extraction attempt
-    print("\n6️⃣ EXTRACTION ATTEMPT")
-    print("-" * 30)
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": """Try to extract trading levels from this chart.
+- Can you see a price scale/axis?""", 200, "gpt-4o-mini", "low"),
+    ("extraction", "6️⃣ EXTRACTION ATTEMPT", "Extraction result", """Try to extract trading levels from this chart.
 Look for:
 - Stop Loss (usually red)
 - Take Profits (usually green)
@@ -189,16 +67,220 @@ Return as JSON or explain why you can't extract these values:
   "take_profit_3": null or number,
   "entry_price": null or number,
   "extraction_notes": "explanation if values can't be found"
-}"""},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_data}", "detail": "high"}}
-                ]
-            }],
-            max_tokens=400
+}""", 400, "gpt-4o", "high"),
+)
+
+# All six diagnostics in one request, so the image is uploaded and prefilled once
+COMBINED_PROMPT = (
+    "Answer each of the following questions about this image. Reply with one JSON object "
+    "whose keys are the question ids below; each value is your answer to that question "
+    "(use a nested object where the question asks for JSON).\n\n"
+    + "\n\n".join(f'=== "{key}" ===\n{question}' for key, _, _, question, *_ in DIAGNOSTIC_QUERIES)
+)
+
+
+# Longest side sent to the model - charts stay readable and need far fewer high-detail tiles
+MAX_LONG_SIDE = 1536
+
+# Send charts as high-quality JPEG (several times smaller than PNG); set to False to
+# fall back to lossless PNG if diagnostics suggest compression is hurting OCR
+USE_JPEG = True
+JPEG_QUALITY = 92
+
+
+def _load_chart(image_path: str) -> Tuple[bytes, str]:
+    """
+    Read the chart, downscaled to MAX_LONG_SIDE and re-encoded for upload
+
+    Returns:
+        (image bytes, mime type)
+    """
+    with open(image_path, 'rb') as f:
+        raw = f.read()
+    mime = "image/jpeg" if raw[:3] == b"\xff\xd8\xff" else "image/png"
+
+    img = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return raw, mime  # Let the API report what's wrong with it
+
+    height, width = img.shape[:2]
+    scale = MAX_LONG_SIDE / max(width, height)
+    if scale < 1.0:
+        img = cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+        print(f"📐 Downscaled {width}x{height} -> {img.shape[1]}x{img.shape[0]} for upload")
+
+    if USE_JPEG:
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        encoded_mime = "image/jpeg"
+    else:
+        # PNG stays lossless at any level; 1 encodes far faster than the default
+        ok, buf = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        encoded_mime = "image/png"
+
+    if ok and (scale < 1.0 or buf.size < len(raw)):
+        return buf.tobytes(), encoded_mime
+    return raw, mime
+
+
+# Phrases in the basic description meaning the model never saw the chart - no point asking the rest
+BLIND_PHRASES = ("cannot see", "can't see", "unable to see", "cannot view", "can't view", "unable to view")
+
+
+def _print_heading(heading: str):
+    print(f"\n{heading}")
+    print("-" * 30)
+
+
+async def run_query(client: openai.AsyncOpenAI, query: tuple, image_parts: dict, echo: bool = False) -> str:
+    """
+    Ask one DIAGNOSTIC_QUERIES entry about the chart, streamed, on the entry's own model and detail
+
+    Args:
+        client: Shared async client
+        query: (key, heading, label, question, max_tokens, model, detail)
+        image_parts: Image message part for each detail level
+        echo: Print the section heading and the answer as it arrives
+    """
+    _, heading, label, question, max_tokens, model, detail = query
+    if echo:
+        _print_heading(heading)
+        print(f"{label}: ", end="", flush=True)
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=[{
+            "role": "user",
+            # Image first: requests on the same model then share an identical prefix, which
+            # OpenAI's prompt cache can reuse instead of re-reading the image each time
+            "content": [
+                image_parts[detail],
+                {"type": "text", "text": question}
+            ]
+        }],
+        max_tokens=max_tokens,
+        stream=True
+    )
+    parts = []
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content or ""
+        parts.append(text)
+        if echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+    if echo:
+        print()
+    return "".join(parts)
+
+
+async def _ask_separately(api_key: str, image_part: dict) -> Optional[dict]:
+    """
+    Run every diagnostic as its own request; failed ones map to their exception
+
+    The basic description goes first and is printed as it streams in. If it shows the model
+    can't see the image, returns None without sending the rest. Otherwise the remaining
+    diagnostics all run at once.
+    """
+    # Same data URL string, different detail levels
+    image_parts = {detail: {"type": "image_url", "image_url": dict(image_part["image_url"], detail=detail)}
+                   for detail in ("low", "high")}
+    description_query, *remaining = DIAGNOSTIC_QUERIES
+
+    async with openai.AsyncOpenAI(api_key=api_key) as client:
+        try:
+            description = await run_query(client, description_query, image_parts, echo=True)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return None
+
+        if any(phrase in description.lower() for phrase in BLIND_PHRASES):
+            print("\n❌ The model can't see the image - skipping the remaining diagnostics")
+            return None
+
+        results = await asyncio.gather(
+            *[run_query(client, query, image_parts) for query in remaining],
+            return_exceptions=True
         )
-        extraction = response.choices[0].message.content
-        print(f"Extraction result:\n{extraction}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
+    return {key: result for (key, *_), result in zip(remaining, results)}
+
+
+def diagnose_chart(image_path: str, api_key: str, separate: bool = False):
+    """
+    Diagnose why chart extraction might be failing
+
+    Args:
+        image_path: Chart image to diagnose
+        api_key: OpenAI API key
+        separate: Ask each question in its own (concurrent) request instead of one combined
+            request - costs 6x the image tokens but keeps each prompt exactly as tuned
+    """
+
+    print("=" * 60)
+    print("CHART EXTRACTION DIAGNOSTIC")
+    print("=" * 60)
+
+    # Check file exists
+    if not Path(image_path).exists():
+        print(f"❌ ERROR: File not found: {image_path}")
+        return
+
+    file_size = Path(image_path).stat().st_size / 1024  # KB
+    print(f"✅ File found: {image_path}")
+    print(f"📊 File size: {file_size:.1f} KB")
+
+    # Load image
+    image_bytes, mime = _load_chart(image_path)
+    image_data = base64.b64encode(image_bytes).decode('ascii')
+
+    # One shared message part - every request references the same data URL string
+    image_part = {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{image_data}", "detail": "high"}}
+
+    print("\n" + "=" * 60)
+    print("RUNNING DIAGNOSTIC QUERIES...")
+    print("=" * 60)
+
+    if separate:
+        answers = asyncio.run(_ask_separately(api_key, image_part))
+        if answers is None:
+            return
+        queries = DIAGNOSTIC_QUERIES[1:]  # The description was printed as it streamed
+    else:
+        queries = DIAGNOSTIC_QUERIES
+
+        def ask_combined() -> dict:
+            client = openai.OpenAI(api_key=api_key)
+            response = client.chat.completions.create(
+                model="gpt-4o",
+                messages=[{
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": COMBINED_PROMPT},
+                        image_part
+                    ]
+                }],
+                response_format={"type": "json_object"},
+                max_tokens=sum(max_tokens for _, _, _, _, max_tokens, *_ in DIAGNOSTIC_QUERIES)
+            )
+            return _json_loads(response.choices[0].message.content)
+
+        try:
+            # Re-diagnosing the same screenshot reuses the stored answers
+            answers = cached_extract(image_bytes, COMBINED_PROMPT, ask_combined)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return
+
+    for key, heading, label, *_ in queries:
+        _print_heading(heading)
+        answer = answers.get(key, "(no answer)")
+        if isinstance(answer, Exception):
+            print(f"❌ Error: {answer}")
+            continue
+        if not isinstance(answer, str):
+            answer = json.dumps(answer, indent=2, ensure_ascii=False)
+        separator = ":\n" if "\n" in answer else ": "
+        print(f"{label}{separator}{answer}")
 
     print("\n" + "=" * 60)
     print("DIAGNOSTIC COMPLETE")
@@ -224,8 +306,8 @@ def main():
 
     # Check for API key in config
     try:
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        with open('config.json', 'rb') as f:
+            config = _json_loads(f.read())
             api_key = config.get('gpt4_api_key')
     except:
         print("❌ Could not load GPT-4 API key from config.json")
@@ -235,29 +317,36 @@ def main():
         print("❌ Valid GPT-4 API key required")
         return
 
+    # --separate asks each diagnostic in its own request
+    args = [arg for arg in sys.argv[1:] if arg != "--separate"]
+    separate = len(args) != len(sys.argv) - 1
+
     # Get image path
-    if len(sys.argv) > 1:
-        image_path = sys.argv[1]
+    if args:
+        image_path = args[0]
     else:
-        # Try to find a recent chart
-        from pathlib import Path
-        charts = list(Path("temp_charts").glob("*.png")) if Path("temp_charts").exists() else []
+        # Try to find a recent chart - keep only the 5 newest without sorting the whole folder
+        charts = []
+        if Path("temp_charts").is_dir():
+            with os.scandir("temp_charts") as entries:
+                pngs = [entry for entry in entries if entry.name.endswith(".png")]
+            charts = [Path(entry.path) for entry in heapq.nlargest(5, pngs, key=lambda e: e.stat().st_mtime)]
 
         if charts:
             print("📊 Found charts in temp_charts/")
-            for i, chart in enumerate(charts[-5:], 1):
+            for i, chart in enumerate(charts, 1):
                 print(f"  {i}. {chart.name}")
 
             choice = input("\nEnter number to diagnose (or path to other image): ").strip()
 
             if choice.isdigit() and 1 <= int(choice) <= len(charts):
-                image_path = str(charts[-5:][int(choice)-1])
+                image_path = str(charts[int(choice)-1])
             else:
                 image_path = choice
         else:
             image_path = input("Enter path to chart image: ").strip()
 
-    diagnose_chart(image_path, api_key)
+    diagnose_chart(image_path, api_key, separate)
 
 
 if __name__ == "__main__":
@@ -4,9 +4,32 @@ Diagnose Discord Bot Disconnection Issues
 """
 
 import re
+import mmap
+import numpy as np
 from datetime import datetime
 from pathlib import Path
 
+# Log events we look for (matched case-insensitively)
+EVENT_KEYWORDS = rb"disconnected|error|exception|logged in as|bot is ready|signal detected"
+
+# Whole lines holding at least one event keyword, matched straight off the raw bytes;
+# everything else is skipped without being decoded into a str
+EVENT_LINE_RE = re.compile(rb"^[^\n]*?(?:" + EVENT_KEYWORDS + rb")[^\n]*", re.IGNORECASE | re.MULTILINE)
+
+# A line can count as several kinds, e.g. a disconnect that is also an error
+KEYWORD_RE = re.compile(EVENT_KEYWORDS, re.IGNORECASE)
+
+TIMESTAMP_RE = re.compile(rb"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+
+# (average uptime below this many minutes, verdict, possible causes) - first match wins
+UPTIME_THRESHOLDS = (
+    (30, "⚠️  Very frequent disconnects (< 30 min average)",
+     ("Rate limiting by Discord", "Network instability", "Bot being detected as spam")),
+    (60, "⚠️  Frequent disconnects (30-60 min average)",
+     ("Session timeout issues", "Memory leaks", "Discord gateway issues")),
+    (float("inf"), "✅ Relatively stable (> 60 min average uptime)", ()),
+)
+
 def analyze_log_file(log_file="neil_bot.log"):
     """Analyze bot log for disconnect patterns"""
 
@@ -24,29 +47,35 @@ def analyze_log_file(log_file="neil_bot.log"):
     connections = []
 
     # Parse log file
-    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-        for line in f:
-            # Find disconnects
-            if "disconnected" in line.lower():
-                match = re.search(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})", line)
-                if match:
-                    timestamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+    with open(log_file, 'rb') as f:
+        if Path(log_file).stat().st_size == 0:
+            event_lines = []
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                event_lines = [m.group() for m in EVENT_LINE_RE.finditer(mm)]
+
+    for line in event_lines:
+        kinds = {kind.lower() for kind in KEYWORD_RE.findall(line)}
+
+        # Find disconnects and successful connections
+        is_disconnect = b"disconnected" in kinds
+        is_connection = b"logged in as" in kinds or b"bot is ready" in kinds
+        if is_disconnect or is_connection:
+            match = TIMESTAMP_RE.search(line)
+            if match:
+                timestamp = datetime.strptime(match.group(1).decode(), "%Y-%m-%d %H:%M:%S")
+                if is_disconnect:
                     disconnects.append(timestamp)
-
-            # Find errors
-            if "error" in line.lower() or "exception" in line.lower():
-                errors.append(line.strip())
-
-            # Find successful connections
-            if "logged in as" in line.lower() or "bot is ready" in line.lower():
-                match = re.search(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})", line)
-                if match:
-                    timestamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+                if is_connection:
                     connections.append(timestamp)
 
-            # Find signals
-            if "signal detected" in line.lower():
-                signals.append(line.strip())
+        # Find errors
+        if b"error" in kinds or b"exception" in kinds:
+            errors.append(line.decode('utf-8', errors='ignore').strip())
+
+        # Find signals
+        if b"signal detected" in kinds:
+            signals.append(line.decode('utf-8', errors='ignore').strip())
 
     # Analyze disconnect patterns
     print(f"\n📊 STATISTICS:")
@@ -62,14 +91,12 @@ def analyze_log_file(log_file="neil_bot.log"):
 
         # Calculate average uptime
         if len(disconnects) > 1:
-            uptimes = []
-            for i in range(1, len(disconnects)):
-                uptime = disconnects[i] - disconnects[i-1]
-                uptimes.append(uptime.total_seconds() / 60)  # Minutes
+            times = np.array(disconnects, dtype="datetime64[s]")
+            uptimes = np.diff(times).astype(np.int64) / 60.0  # Minutes
 
-            avg_uptime = sum(uptimes) / len(uptimes)
-            max_uptime = max(uptimes)
-            min_uptime = min(uptimes)
+            avg_uptime = float(uptimes.mean())
+            max_uptime = float(uptimes.max())
+            min_uptime = float(uptimes.min())
 
             print(f"\n📈 UPTIME ANALYSIS:")
             print(f"  Average time between disconnects: {avg_uptime:.1f} minutes")
@@ -79,22 +106,14 @@ def analyze_log_file(log_file="neil_bot.log"):
             # Check for patterns
             print(f"\n🔍 PATTERN DETECTION:")
 
-            if avg_uptime < 30:
-                print("  ⚠️  Very frequent disconnects (< 30 min average)")
-                print("  Possible causes:")
-                print("  - Rate limiting by Discord")
-                print("  - Network instability")
-                print("  - Bot being detected as spam")
-
-            elif avg_uptime < 60:
-                print("  ⚠️  Frequent disconnects (30-60 min average)")
-                print("  Possible causes:")
-                print("  - Session timeout issues")
-                print("  - Memory leaks")
-                print("  - Discord gateway issues")
-
-            else:
-                print("  ✅ Relatively stable (> 60 min average uptime)")
+            for limit, verdict, causes in UPTIME_THRESHOLDS:
+                if avg_uptime < limit:
+                    print(f"  {verdict}")
+                    if causes:
+                        print("  Possible causes:")
+                        for cause in causes:
+                            print(f"  - {cause}")
+                    break
 
     if errors:
         print(f"\n❌ RECENT ERRORS:")
@@ -111,17 +130,20 @@ def analyze_log_file(log_file="neil_bot.log"):
     # Check for specific issues
     print(f"\n🔧 SPECIFIC ISSUES:")
 
-    heartbeat_issues = sum(1 for e in errors if "heartbeat" in e.lower())
+    # Lowercase each error once for the three checks below
+    lowered_errors = [e.lower() for e in errors]
+
+    heartbeat_issues = sum(1 for e in lowered_errors if "heartbeat" in e)
     if heartbeat_issues > 0:
         print(f"  ⚠️  Heartbeat issues detected ({heartbeat_issues} occurrences)")
         print("     Solution: Use neil_bot_stable.py with better async handling")
 
-    timeout_issues = sum(1 for e in errors if "timeout" in e.lower())
+    timeout_issues = sum(1 for e in lowered_errors if "timeout" in e)
     if timeout_issues > 0:
         print(f"  ⚠️  Timeout issues detected ({timeout_issues} occurrences)")
         print("     Solution: Chart extraction timeouts reduced in stable version")
 
-    connection_closed = sum(1 for e in errors if "connectionclosed" in e.lower() or "connection closed" in e.lower())
+    connection_closed = sum(1 for e in lowered_errors if "connectionclosed" in e or "connection closed" in e)
     if connection_closed > 0:
         print(f"  ⚠️  Connection closed errors ({connection_closed} occurrences)")
         print("     Solution: Auto-reconnection in stable version")
@@ -5,7 +5,25 @@ Provides options to adjust extraction behavior
 """
 
 import json
+import hashlib
 from pathlib import Path
+from typing import Any, Callable
+
+try:
+    # C parser/serializer; its errors subclass json.JSONDecodeError, and 2 is its only indent
+    from orjson import loads as _json_loads, dumps as _orjson_dumps, OPT_INDENT_2
+
+    def _json_dumps_pretty(obj) -> bytes:
+        return _orjson_dumps(obj, option=OPT_INDENT_2)
+except ImportError:
+    from json import loads as _json_loads
+
+    def _json_dumps_pretty(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# Extraction results memoized by chart content + prompt, one small JSON per entry
+EXTRACTION_CACHE_DIR = Path(".cache/chart_extractions")
 
 
 def create_tuned_extractor():
@@ -120,13 +138,50 @@ Return exact prices found."""
     }
 
     # Save configuration
-    with open("extraction_tuning.json", "w") as f:
-        json.dump(config, f, indent=2)
+    with open("extraction_tuning.json", "wb") as f:
+        f.write(_json_dumps_pretty(config))
 
     print("Fine-tuning configuration created: extraction_tuning.json")
     return config
 
 
+def cache_key(image_bytes: bytes, prompt: str) -> str:
+    """Content hash of a chart image together with the prompt it was asked"""
+    return hashlib.sha256(image_bytes + prompt.encode()).hexdigest()
+
+
+def cached_extract(image_bytes: bytes, prompt: str, call_fn: Callable[[], Any]) -> Any:
+    """
+    Return the stored result for this image + prompt, or run call_fn and store what it returns
+
+    Re-running against the same screenshot then costs no API call. Pass the prompt text
+    itself (not just a name) so that editing a prompt invalidates its old results.
+    """
+    path = EXTRACTION_CACHE_DIR / f"{cache_key(image_bytes, prompt)}.json"
+    if path.exists():
+        try:
+            return _json_loads(path.read_bytes())
+        except ValueError:
+            pass  # Corrupt entry - fetch a fresh result and overwrite it
+
+    result = call_fn()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result), encoding="utf-8")
+    return result
+
+
+# (key, label) for each price level, in display order
+PRICE_FIELDS = (("entry", "Entry"), ("sl", "Stop Loss"), ("tp1", "TP1"), ("tp2", "TP2"), ("tp3", "TP3"))
+
+
+def print_prices(prices: dict):
+    """Print each price level, showing N/A for missing or non-numeric values"""
+    for key, label in PRICE_FIELDS:
+        value = prices.get(key)
+        shown = f"${value:,.2f}" if isinstance(value, (int, float)) else "N/A"
+        print(f"  {label + ':':<11}{shown}")
+
+
 def analyze_extraction_accuracy(extracted_prices: dict, actual_prices: dict = None):
     """Analyze extraction accuracy and suggest improvements"""
 
@@ -135,19 +190,11 @@ def analyze_extraction_accuracy(extracted_prices: dict, actual_prices: dict = No
     print("="*60)
 
     print("\nExtracted Prices:")
-    print(f"  Entry:     ${extracted_prices.get('entry', 'N/A'):,.2f}")
-    print(f"  Stop Loss: ${extracted_prices.get('sl', 'N/A'):,.2f}")
-    print(f"  TP1:       ${extracted_prices.get('tp1', 'N/A'):,.2f}")
-    print(f"  TP2:       ${extracted_prices.get('tp2', 'N/A'):,.2f}")
-    print(f"  TP3:       ${extracted_prices.get('tp3', 'N/A'):,.2f}")
+    print_prices(extracted_prices)
 
     if actual_prices:
         print("\nActual Prices (for comparison):")
-        print(f"  Entry:     ${actual_prices.get('entry', 'N/A'):,.2f}")
-        print(f"  Stop Loss: ${actual_prices.get('sl', 'N/A'):,.2f}")
-        print(f"  TP1:       ${actual_prices.get('tp1', 'N/A'):,.2f}")
-        print(f"  TP2:       ${actual_prices.get('tp2', 'N/A'):,.2f}")
-        print(f"  TP3:       ${actual_prices.get('tp3', 'N/A'):,.2f}")
+        print_prices(actual_prices)
 
         print("\nDifferences:")
         for key in ['entry', 'sl', 'tp1', 'tp2', 'tp3']:
@@ -241,8 +288,7 @@ def main():
         print("\nEnter the CORRECT prices (press Enter to skip):")
         actual = {}
 
-        for key, label in [('entry', 'Entry'), ('sl', 'Stop Loss'),
-                          ('tp1', 'TP1'), ('tp2', 'TP2'), ('tp3', 'TP3')]:
+        for key, label in PRICE_FIELDS:
             value = input(f"  {label}: ").strip()
             if value:
                 try:
@@ -8,6 +8,7 @@ import time
 import datetime
 import sys
 import os
+import atexit
 
 def monitor_bot():
     """Monitor and restart bot as needed"""
@@ -22,8 +23,10 @@ def monitor_bot():
     restart_count = 0
     max_restarts = 100  # Allow many restarts
 
-    # Log file for monitoring
+    # Log file for monitoring - opened once, line-buffered, for the whole session
     log_file = "monitor.log"
+    log = open(log_file, 'a', encoding='utf-8', buffering=1)
+    atexit.register(log.close)
 
     while restart_count < max_restarts:
         try:
@@ -32,16 +35,25 @@ def monitor_bot():
             print(f"\n🚀 Starting bot... (Attempt #{restart_count + 1})")
             print(f"Time: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
-            # Log start
-            with open(log_file, 'a') as f:
-                f.write(f"\n[{start_time}] Starting bot (Attempt #{restart_count + 1})\n")
-
-            # Run the stable version
-            process = subprocess.run(
+            # Run the stable version, teeing its output to the console and the log as it arrives
+            # (unbuffered, so lines show up immediately instead of when the child's buffer fills)
+            env = dict(os.environ, PYTHONUNBUFFERED="1")
+            log.write(f"\n[{start_time}] Starting bot (Attempt #{restart_count + 1})\n")
+            process = subprocess.Popen(
                 [sys.executable, "neil_bot_stable.py"],
-                capture_output=False,
-                text=True
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                bufsize=1,
+                env=env
             )
+            for line in process.stdout:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+                log.write(line)
+            process.wait()
 
             # Calculate uptime
             end_time = datetime.datetime.now()
@@ -51,8 +63,7 @@ def monitor_bot():
             print(f"Exit code: {process.returncode}")
 
             # Log stop
-            with open(log_file, 'a') as f:
-                f.write(f"[{end_time}] Bot stopped after {uptime}, exit code: {process.returncode}\n")
+            log.write(f"[{end_time}] Bot stopped after {uptime}, exit code: {process.returncode}\n")
 
             if process.returncode == 0:
                 # Clean exit
@@ -62,7 +73,9 @@ def monitor_bot():
             # Wait before restart
             restart_count += 1
             if restart_count < max_restarts:
-                wait_time = min(30, 5 + restart_count * 2)  # Gradually increase wait time
+                # Exponential backoff (10s, 20s, 40s ... capped at 5 min) so a Discord
+                # outage doesn't turn into a tight restart loop
+                wait_time = min(300, 5 * 2 ** min(restart_count, 6))
                 print(f"🔄 Restarting in {wait_time} seconds...")
                 time.sleep(wait_time)
 
@@ -12,16 +12,41 @@ import json
 import sqlite3
 import asyncio
 import time
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator
+from contextlib import contextmanager
 from pathlib import Path
 import logging
-from dataclasses import dataclass, asdict
+import logging.handlers
+import atexit
+from dataclasses import dataclass
 import sys
 import os
 import aiohttp
 from concurrent.futures import ThreadPoolExecutor
 
+try:
+    # C parser/serializer; its errors subclass json.JSONDecodeError, and 2 is its only indent
+    from orjson import loads as _json_loads, dumps as _orjson_dumps, OPT_INDENT_2
+
+    def _json_dumps_pretty(obj) -> bytes:
+        return _orjson_dumps(obj, option=OPT_INDENT_2)
+
+    def _json_dumps(obj) -> str:
+        return _orjson_dumps(obj).decode()
+except ImportError:
+    from json import loads as _json_loads, dumps as _json_dumps
+
+    def _json_dumps_pretty(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+try:
+    # Linear-time engine for the signal patterns - no backtracking blowup on long messages
+    import re2 as _signal_re
+except ImportError:
+    _signal_re = re
+
 # Force UTF-8 encoding environment variable for Windows
 if sys.platform == 'win32':
     import codecs
@@ -38,6 +63,10 @@ ChartPriceExtractor = None  # Will be imported when needed
 # CONFIGURATION
 # ============================================================================
 
+# Parsed config files by (path, modification time) - a restart re-reads only an edited file
+_CONFIG_CACHE: Dict[tuple, dict] = {}
+
+
 class Config:
     """Bot configuration"""
 
@@ -51,8 +80,12 @@ class Config:
             self.create_default_config()
 
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            cache_key = (self.config_file, os.stat(self.config_file).st_mtime_ns)
+            config = _CONFIG_CACHE.get(cache_key)
+            if config is None:
+                with open(self.config_file, 'rb') as f:
+                    config = _json_loads(f.read())
+                _CONFIG_CACHE[cache_key] = config
         except json.JSONDecodeError as e:
             print(f"ERROR: Invalid JSON in {self.config_file}: {e}")
             sys.exit(1)
@@ -71,6 +104,10 @@ class Config:
         self.ENABLE_NOTIFICATIONS = config.get("enable_notifications", True)
         self.MIN_CONFIDENCE = config.get("min_confidence", 0.7)
 
+        # Lowercased once here so on_message doesn't redo it for every message
+        self.NEIL_USERNAMES_LC = [username.lower() for username in self.NEIL_USERNAMES]
+        self.ALERT_TAGS_LC = [tag.lower() for tag in self.ALERT_TAGS]
+
         # Validate required fields
         if not self.CHANNEL_IDS:
             print("WARNING: No channel IDs configured in config.json")
@@ -91,8 +128,8 @@ class Config:
             "min_confidence": 0.7
         }
 
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(default_config, f, indent=4, ensure_ascii=False)
+        with open(self.config_file, 'wb') as f:
+            f.write(_json_dumps_pretty(default_config))
 
         print(f"Created default config file: {self.config_file}")
         print("Please edit the config file with your Discord token and channel IDs")
@@ -102,7 +139,7 @@ class Config:
 # DATA MODELS
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class TradingSignal:
     """Trading signal data structure"""
     signal_type: str  # LONG or SHORT
@@ -124,9 +161,25 @@ class TradingSignal:
 
     def to_dict(self):
         """Convert to dictionary"""
-        data = asdict(self)
-        data['timestamp'] = self.timestamp.isoformat()
-        return data
+        # Built directly - every field is flat, so asdict's recursive deep copy buys nothing
+        return {
+            'signal_type': self.signal_type,
+            'ticker': self.ticker,
+            'raw_message': self.raw_message,
+            'timestamp': self.timestamp.isoformat(),
+            'confidence': self.confidence,
+            'entry_price': self.entry_price,
+            'stop_loss': self.stop_loss,
+            'take_profit_1': self.take_profit_1,
+            'take_profit_2': self.take_profit_2,
+            'take_profit_3': self.take_profit_3,
+            'leverage': self.leverage,
+            'dca_levels': list(self.dca_levels) if self.dca_levels is not None else None,
+            'notes': self.notes,
+            'message_id': self.message_id,
+            'author': self.author,
+            'channel_id': self.channel_id,
+        }
 
 # ============================================================================
 # DATABASE MANAGER
@@ -135,15 +188,40 @@ class TradingSignal:
 class DatabaseManager:
     """Handles all database operations"""
 
+    # Applied once to the long-lived connection: WAL lets reads run alongside the
+    # single writer, and NORMAL sync skips the per-commit fsync that WAL doesn't need
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-64000",  # 64 MB page cache
+    )
+
     def __init__(self, db_path: str = "signals.db"):
         self.db_path = db_path
+
+        # One connection for the bot's lifetime instead of a connect/close per query;
+        # autocommit mode, with the lock serializing use from executor threads
+        # The driver keeps each distinct SQL string compiled for reuse; fixed SQL with bound
+        # parameters (below) means every query this class runs stays in that cache
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                    cached_statements=256)
+        self.lock = threading.Lock()
+        for pragma in self.PRAGMAS:
+            self.conn.execute(pragma)
+
         self.init_database()
 
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
+
     def init_database(self):
         """Initialize database schema"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # Runs from __init__, before the connection is shared
+            cursor = self.conn.cursor()
 
             # Create signals table
             cursor.execute("""
@@ -152,7 +230,7 @@ class DatabaseManager:
                     signal_type TEXT NOT NULL,
                     ticker TEXT NOT NULL,
                     raw_message TEXT NOT NULL,
-                    timestamp DATETIME NOT NULL,
+                    timestamp INTEGER NOT NULL,  -- Microseconds since the Unix epoch
                     confidence REAL NOT NULL,
                     entry_price REAL,
                     stop_loss REAL,
@@ -193,40 +271,103 @@ class DatabaseManager:
                 )
             """)
 
-            conn.commit()
-            conn.close()
+            # Older versions stored timestamps as ISO-8601 text; convert those rows once
+            legacy_rows = cursor.execute(
+                "SELECT id, timestamp FROM signals WHERE typeof(timestamp) = 'text'"
+            ).fetchall()
+            if legacy_rows:
+                converted = []
+                for row_id, text in legacy_rows:
+                    try:
+                        converted.append((self.to_epoch_us(datetime.fromisoformat(text)), row_id))
+                    except ValueError:
+                        logging.warning(f"Leaving unparseable timestamp on signal {row_id}: {text!r}")
+                cursor.executemany("UPDATE signals SET timestamp = ? WHERE id = ?", converted)
+                logging.info(f"Converted {len(converted)} signal timestamps to epoch microseconds")
+
+            # Recent-signal listing sorts by timestamp; statistics filter on it per signal type
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_ts ON signals(timestamp DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_type_ts ON signals(signal_type, timestamp)")
+
+            # Gather planner statistics once, the first time the database is set up
+            if not cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+                cursor.execute("ANALYZE")
 
             logging.info(f"Database initialized at {self.db_path}")
         except sqlite3.Error as e:
             logging.error(f"Database initialization failed: {e}")
             raise
 
+    INSERT_SIGNAL_SQL = """
+        INSERT INTO signals (
+            signal_type, ticker, raw_message, timestamp, confidence,
+            entry_price, stop_loss, take_profit_1, take_profit_2, take_profit_3,
+            leverage, dca_levels, notes, message_id, author, channel_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    UPDATE_SIGNAL_SQL = """
+        UPDATE signals SET
+            entry_price = ?, stop_loss = ?, take_profit_1 = ?, take_profit_2 = ?, take_profit_3 = ?,
+            leverage = ?, dca_levels = ?, notes = ?
+        WHERE id = ?
+    """
+
+    SELECT_RECENT_SQL = """
+        SELECT
+            signal_type, ticker, raw_message, timestamp, confidence,
+            entry_price, stop_loss, take_profit_1, take_profit_2, take_profit_3,
+            leverage, dca_levels, notes, message_id, author, channel_id
+        FROM signals
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """
+
+    STATS_SQL = """
+        SELECT
+            COUNT(*) as total,
+            SUM(CASE WHEN signal_type = 'LONG' THEN 1 ELSE 0 END) as longs,
+            SUM(CASE WHEN signal_type = 'SHORT' THEN 1 ELSE 0 END) as shorts,
+            AVG(confidence) as avg_confidence
+        FROM signals
+        WHERE timestamp >= (CAST(strftime('%s', 'now') AS INTEGER) - ? * 86400) * 1000000
+    """
+
+    @staticmethod
+    def to_epoch_us(timestamp: datetime) -> int:
+        """Database form of a (local, naive) signal timestamp: microseconds since the Unix epoch"""
+        return round(timestamp.timestamp() * 1_000_000)
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the lock and run the block as one write transaction, rolled back on error"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    @classmethod
+    def _signal_row(cls, signal: TradingSignal) -> tuple:
+        """INSERT_SIGNAL_SQL parameters for a signal"""
+        dca_levels_json = _json_dumps(signal.dca_levels) if signal.dca_levels else None
+        return (
+            signal.signal_type, signal.ticker, signal.raw_message,
+            cls.to_epoch_us(signal.timestamp), signal.confidence,
+            signal.entry_price, signal.stop_loss,
+            signal.take_profit_1, signal.take_profit_2, signal.take_profit_3,
+            signal.leverage, dca_levels_json, signal.notes,
+            signal.message_id, signal.author, signal.channel_id
+        )
+
     def save_signal(self, signal: TradingSignal) -> int:
         """Save trading signal to database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            dca_levels_json = json.dumps(signal.dca_levels) if signal.dca_levels else None
-
-            cursor.execute("""
-                INSERT INTO signals (
-                    signal_type, ticker, raw_message, timestamp, confidence,
-                    entry_price, stop_loss, take_profit_1, take_profit_2, take_profit_3,
-                    leverage, dca_levels, notes, message_id, author, channel_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                signal.signal_type, signal.ticker, signal.raw_message,
-                signal.timestamp.isoformat(), signal.confidence,
-                signal.entry_price, signal.stop_loss,
-                signal.take_profit_1, signal.take_profit_2, signal.take_profit_3,
-                signal.leverage, dca_levels_json, signal.notes,
-                signal.message_id, signal.author, signal.channel_id
-            ))
-
-            signal_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self._transaction() as conn:
+                signal_id = conn.execute(self.INSERT_SIGNAL_SQL, self._signal_row(signal)).lastrowid
 
             logging.info(f"Signal saved to database: {signal.ticker} {signal.signal_type}")
             return signal_id
@@ -234,50 +375,66 @@ class DatabaseManager:
             logging.error(f"Failed to save signal to database: {e}")
             return -1
 
-    def get_recent_signals(self, limit: int = 10) -> List[TradingSignal]:
-        """Get recent signals from database"""
+    def save_signals_bulk(self, signals: List[TradingSignal]) -> int:
+        """Save several signals in a single transaction (e.g. a replay/backfill); returns how many were saved"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._transaction() as conn:
+                conn.executemany(self.INSERT_SIGNAL_SQL, [self._signal_row(signal) for signal in signals])
 
-            cursor.execute("""
-                SELECT * FROM signals
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (limit,))
+            logging.info(f"{len(signals)} signals saved to database")
+            return len(signals)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to save signals to database: {e}")
+            return 0
+
+    def update_signal(self, signal_id: int, signal: TradingSignal) -> bool:
+        """Write a saved signal's price levels and notes back to its row; False if there is no such row"""
+        try:
+            dca_levels_json = _json_dumps(signal.dca_levels) if signal.dca_levels else None
+            with self._transaction() as conn:
+                updated = conn.execute(self.UPDATE_SIGNAL_SQL, (
+                    signal.entry_price, signal.stop_loss,
+                    signal.take_profit_1, signal.take_profit_2, signal.take_profit_3,
+                    signal.leverage, dca_levels_json, signal.notes,
+                    signal_id
+                )).rowcount
+
+            if updated:
+                logging.info(f"Signal updated in database: {signal.ticker} {signal.signal_type}")
+            return bool(updated)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to update signal in database: {e}")
+            return False
+
+    def iter_recent_signals(self, limit: int = 10) -> Iterator[TradingSignal]:
+        """
+        Yield recent signals from database, newest first
 
+        Rows are fetched up front (so the lock isn't held while the caller iterates), but each
+        one is only decoded into a TradingSignal when reached - a caller that stops after the
+        first few skips the rest. Raises sqlite3.Error if the query fails.
+        """
+        with self.lock:
+            cursor = self.conn.execute(self.SELECT_RECENT_SQL, (limit,))
+            cursor.row_factory = sqlite3.Row
             rows = cursor.fetchall()
-            conn.close()
 
-            # Convert rows to TradingSignal objects
-            signals = []
-            for row in rows:
-                try:
-                    dca_levels = json.loads(row[12]) if row[12] else None
-                    signal = TradingSignal(
-                        signal_type=row[1],
-                        ticker=row[2],
-                        raw_message=row[3],
-                        timestamp=datetime.fromisoformat(row[4]),
-                        confidence=row[5],
-                        entry_price=row[6],
-                        stop_loss=row[7],
-                        take_profit_1=row[8],
-                        take_profit_2=row[9],
-                        take_profit_3=row[10],
-                        leverage=row[11],
-                        dca_levels=dca_levels,
-                        notes=row[13],
-                        message_id=row[14],
-                        author=row[15],
-                        channel_id=row[16]
-                    )
-                    signals.append(signal)
-                except (ValueError, json.JSONDecodeError) as e:
-                    logging.warning(f"Skipping malformed signal row: {e}")
-                    continue
+        for row in rows:
+            try:
+                # Columns are named after the TradingSignal fields; only two need decoding
+                data = dict(row)
+                data['timestamp'] = datetime.fromtimestamp(row['timestamp'] / 1_000_000)
+                data['dca_levels'] = _json_loads(row['dca_levels']) if row['dca_levels'] else None
+                signal = TradingSignal(**data)
+            except (ValueError, TypeError, json.JSONDecodeError) as e:
+                logging.warning(f"Skipping malformed signal row: {e}")
+                continue
+            yield signal
 
-            return signals
+    def get_recent_signals(self, limit: int = 10) -> List[TradingSignal]:
+        """Get recent signals from database"""
+        try:
+            return list(self.iter_recent_signals(limit))
         except sqlite3.Error as e:
             logging.error(f"Failed to retrieve signals from database: {e}")
             return []
@@ -285,21 +442,8 @@ class DatabaseManager:
     def get_statistics(self, days: int = 7) -> Dict:
         """Get trading statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT
-                    COUNT(*) as total,
-                    SUM(CASE WHEN signal_type = 'LONG' THEN 1 ELSE 0 END) as longs,
-                    SUM(CASE WHEN signal_type = 'SHORT' THEN 1 ELSE 0 END) as shorts,
-                    AVG(confidence) as avg_confidence
-                FROM signals
-                WHERE timestamp >= datetime('now', '-' || ? || ' days')
-            """, (days,))
-
-            row = cursor.fetchone()
-            conn.close()
+            with self.lock:
+                row = self.conn.execute(self.STATS_SQL, (days,)).fetchone()
 
             return {
                 'total_signals': row[0] or 0,
@@ -378,38 +522,55 @@ class SignalDetector:
         r"(\$?[A-Z]{2,10})\s+short\s+here",
     ]
 
-    def __init__(self):
-        # Compile patterns for efficiency
-        self.long_regex = [re.compile(pattern, re.IGNORECASE) for pattern in self.LONG_PATTERNS]
-        self.short_regex = [re.compile(pattern, re.IGNORECASE) for pattern in self.SHORT_PATTERNS]
+    # Every pattern on a side contains one of these words; a message with none of them
+    # can't match that side, and a substring check is far cheaper than 13 regex searches
+    LONG_KEYWORDS = ("long", "bought", "buying")
+    SHORT_KEYWORDS = ("short", "sold", "selling")
+
+    # "at cmp" marks a current-market-price entry
+    CMP_RE = re.compile(r"\bat\s+cmp\b", re.IGNORECASE)
+
+    # Compiled once at import and shared by every instance. They stay separate rather than
+    # fused into one alternation per side: list order is their priority (an alternation
+    # returns the leftmost match instead - "now long BTC" would give NOW), and each standalone
+    # pattern keeps re's literal-prefix scan, which made 13 searches measure faster than one
+    # fused search. Bound search methods skip the attribute lookup per pattern.
+    # Inline (?i) rather than a flags argument, which not every re2 binding accepts.
+    long_regex = tuple(_signal_re.compile("(?i)" + pattern).search for pattern in LONG_PATTERNS)
+    short_regex = tuple(_signal_re.compile("(?i)" + pattern).search for pattern in SHORT_PATTERNS)
 
     def detect_signal(self, message_content: str) -> Optional[TradingSignal]:
         """
         Detect trading signal from message content
         Returns TradingSignal object or None
         """
+        lowered = message_content.lower()
+        # Substring check first - the regex only runs for the rare message mentioning cmp
+        is_cmp = "cmp" in lowered and self.CMP_RE.search(message_content) is not None
 
         # Check for LONG signals
-        for pattern in self.long_regex:
-            match = pattern.search(message_content)
+        for search in (self.long_regex if any(word in lowered for word in self.LONG_KEYWORDS) else ()):
+            match = search(message_content)
             if match:
                 ticker = self._clean_ticker(match.group(1))
                 signal = self._build_signal(
                     signal_type="LONG",
                     ticker=ticker,
-                    message=message_content
+                    message=message_content,
+                    is_cmp=is_cmp
                 )
                 return signal
 
         # Check for SHORT signals
-        for pattern in self.short_regex:
-            match = pattern.search(message_content)
+        for search in (self.short_regex if any(word in lowered for word in self.SHORT_KEYWORDS) else ()):
+            match = search(message_content)
             if match:
                 ticker = self._clean_ticker(match.group(1))
                 signal = self._build_signal(
                     signal_type="SHORT",
                     ticker=ticker,
-                    message=message_content
+                    message=message_content,
+                    is_cmp=is_cmp
                 )
                 return signal
 
@@ -419,11 +580,11 @@ class SignalDetector:
         """Clean ticker symbol"""
         return ticker.replace('$', '').upper().strip()
 
-    def _build_signal(self, signal_type: str, ticker: str, message: str) -> TradingSignal:
+    def _build_signal(self, signal_type: str, ticker: str, message: str, is_cmp: bool) -> TradingSignal:
         """Build signal with minimal extraction - price data comes from images"""
 
-        # Detect entry type (CMP vs MARKET)
-        entry_type = "CMP" if re.search(r"\bat\s+cmp\b", message, re.IGNORECASE) else "MARKET"
+        # Entry type (CMP vs MARKET)
+        entry_type = "CMP" if is_cmp else "MARKET"
 
         signal = TradingSignal(
             signal_type=signal_type,
@@ -447,41 +608,48 @@ class NotificationManager:
     def __init__(self, webhook_url: Optional[str] = None):
         self.webhook_url = webhook_url
 
+    SEPARATOR = "=" * 60
+
+    # (attribute, label) for each price level shown in an alert
+    PRICE_LINES = (
+        ("entry_price", "  Entry:     "),
+        ("stop_loss", "  🛑 SL:     "),
+        ("take_profit_1", "  🎯 TP1:    "),
+        ("take_profit_2", "  🎯 TP2:    "),
+        ("take_profit_3", "  🎯 TP3:    "),
+    )
+
     def format_signal_alert(self, signal: TradingSignal) -> str:
         """Format signal as text alert"""
 
         type_emoji = "🟢" if signal.signal_type == "LONG" else "🔴"
 
-        alert = f"\n{'='*60}\n"
-        alert += f"🚨 {type_emoji} {signal.signal_type} SIGNAL - {signal.ticker}\n"
-        alert += f"{'='*60}\n"
-        alert += f"Time: {signal.timestamp.strftime('%H:%M:%S')}\n"
-        alert += f"Entry: {signal.notes if signal.notes else 'MARKET'}\n"
+        parts = [
+            f"\n{self.SEPARATOR}\n",
+            f"🚨 {type_emoji} {signal.signal_type} SIGNAL - {signal.ticker}\n",
+            f"{self.SEPARATOR}\n",
+            f"Time: {signal.timestamp:%H:%M:%S}\n",
+            f"Entry: {signal.notes if signal.notes else 'MARKET'}\n",
+        ]
 
         # Show extracted price levels if available
-        has_prices = any([signal.entry_price, signal.stop_loss, signal.take_profit_1])
+        has_prices = signal.entry_price or signal.stop_loss or signal.take_profit_1
 
         if has_prices:
-            alert += f"\n📊 PRICE LEVELS:\n"
-            if signal.entry_price:
-                alert += f"  Entry:     ${signal.entry_price:,.4f}\n"
-            if signal.stop_loss:
-                alert += f"  🛑 SL:     ${signal.stop_loss:,.4f}\n"
-            if signal.take_profit_1:
-                alert += f"  🎯 TP1:    ${signal.take_profit_1:,.4f}\n"
-            if signal.take_profit_2:
-                alert += f"  🎯 TP2:    ${signal.take_profit_2:,.4f}\n"
-            if signal.take_profit_3:
-                alert += f"  🎯 TP3:    ${signal.take_profit_3:,.4f}\n"
+            parts.append("\n📊 PRICE LEVELS:\n")
+            for attribute, label in self.PRICE_LINES:
+                price = getattr(signal, attribute)
+                if price:
+                    parts.append(f"{label}${price:,.4f}\n")
 
             if signal.notes and "OCR" in signal.notes:
-                alert += f"\n{signal.notes}\n"
+                parts.append(f"\n{signal.notes}\n")
         else:
-            alert += f"\n⚠️  NO PRICES EXTRACTED - Check Discord\n"
+            parts.append("\n⚠️  NO PRICES EXTRACTED - Check Discord\n")
 
-        alert += f"{'='*60}\n"
+        parts.append(f"{self.SEPARATOR}\n")
 
-        return alert
+        return "".join(parts)
 
     async def send_notification(self, signal: TradingSignal):
         """Send notification via webhook"""
@@ -509,9 +677,19 @@ class NeilBot(discord.Client):
         self.signal_count = 0
         self.pending_signal = None  # Store signal waiting for chart
         self.pending_signal_time = None  # Timestamp of signal
+        self.pending_signal_id = None  # Database row of the pending signal
+        self._attachment_waiters = {}  # Message id -> future resolved by on_message_edit
+
+        # Thread pool for chart extraction - mostly waiting on the vision API, so sized so that
+        # signals arriving together don't queue behind each other's 30s timeout
+        self.ocr_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 2), thread_name_prefix="ocr")
+
+        # SQLite has a single writer anyway; its own thread keeps saves from queueing
+        # behind chart extractions
+        self.db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="signals-db")
 
-        # Initialize thread pool for async operations
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Created on first download; must be built inside the running event loop
+        self._http_session = None
 
         # Initialize chart extractor if available (lazy-loaded)
         if CHART_EXTRACTOR_AVAILABLE:
@@ -519,7 +697,8 @@ class NeilBot(discord.Client):
                 # Lazy-load the chart extractor to avoid blocking bot startup
                 from chart_extractor import HybridChartExtractor
                 gpt4_key = config.GPT4_API_KEY
-                self.chart_extractor = HybridChartExtractor(gpt4_api_key=gpt4_key)
+                # Budget under the 30s extraction timeout, so a slow strategy race still returns its best result
+                self.chart_extractor = HybridChartExtractor(gpt4_api_key=gpt4_key, time_budget=25)
                 logging.info("Chart extractor initialized with GPT-4 Vision")
             except Exception as e:
                 error_msg = str(e).encode('ascii', errors='ignore').decode('ascii')
@@ -529,10 +708,6 @@ class NeilBot(discord.Client):
         else:
             self.chart_extractor = None
 
-        # Create temp directory for downloaded images
-        self.temp_dir = Path("temp_charts")
-        self.temp_dir.mkdir(exist_ok=True)
-
     async def on_ready(self):
         """Called when bot is ready"""
         logging.info(f"✓ Logged in as {self.user}")
@@ -540,14 +715,18 @@ class NeilBot(discord.Client):
         logging.info(f"✓ Database: {self.config.DATABASE_PATH}")
         logging.info(f"✓ Bot is ready and listening for signals...")
 
-        print("\n" + "=" * 60, flush=True)
-        print("✅ NEIL SIGNAL BOT ACTIVE", flush=True)
-        print("=" * 60, flush=True)
-        print(f"📊 Monitoring {len(self.config.CHANNEL_IDS)} channels", flush=True)
-        print(f"👤 Tracking {len(self.config.NEIL_USERNAMES)} usernames", flush=True)
-        print(f"🤖 Chart Extraction: {'GPT-4 Vision' if self.chart_extractor else 'Disabled'}", flush=True)
-        print("=" * 60, flush=True)
-        print("\n⏳ Waiting for signals...\n", flush=True)
+        # One write and one flush for the whole banner
+        sys.stdout.write(
+            f"\n{'=' * 60}\n"
+            "✅ NEIL SIGNAL BOT ACTIVE\n"
+            f"{'=' * 60}\n"
+            f"📊 Monitoring {len(self.config.CHANNEL_IDS)} channels\n"
+            f"👤 Tracking {len(self.config.NEIL_USERNAMES)} usernames\n"
+            f"🤖 Chart Extraction: {'GPT-4 Vision' if self.chart_extractor else 'Disabled'}\n"
+            f"{'=' * 60}\n"
+            "\n⏳ Waiting for signals...\n\n"
+        )
+        sys.stdout.flush()
 
     async def on_message(self, message):
         """Process incoming messages"""
@@ -559,10 +738,10 @@ class NeilBot(discord.Client):
                 return
 
             # Check if from Neil or has alert tag
-            is_from_neil = any(username.lower() in message.author.name.lower()
-                             for username in self.config.NEIL_USERNAMES)
-            has_alert_tag = any(tag.lower() in message.content.lower()
-                              for tag in self.config.ALERT_TAGS)
+            author_lc = message.author.name.lower()
+            is_from_neil = any(username in author_lc for username in self.config.NEIL_USERNAMES_LC)
+            content_lc = message.content.lower()
+            has_alert_tag = any(tag in content_lc for tag in self.config.ALERT_TAGS_LC)
 
             # Check if this is an image following a recent signal (from Neil)
             if self.pending_signal and message.attachments and is_from_neil:
@@ -571,15 +750,17 @@ class NeilBot(discord.Client):
                     logging.info("Found image following signal, processing...")
                     await self._process_chart_images(message, self.pending_signal)
 
-                    # Save updated signal
-                    self.db.save_signal(self.pending_signal)
+                    # Fill in the prices on the row saved when the signal arrived
+                    if not await self._run_db(self.db.update_signal, self.pending_signal_id, self.pending_signal):
+                        await self._run_db(self.db.save_signal, self.pending_signal)
 
                     # Print updated alert
                     alert = self.notifier.format_signal_alert(self.pending_signal)
-                    print(alert)
+                    sys.stdout.write(alert + "\n")  # One write per alert
 
                     self.pending_signal = None
                     self.pending_signal_time = None
+                    self.pending_signal_id = None
                 return
 
             if not (is_from_neil or has_alert_tag):
@@ -598,29 +779,33 @@ class NeilBot(discord.Client):
                 signal.author = message.author.name
                 signal.channel_id = message.channel.id
 
-                # Wait and check for attachments
-                logging.info(f"Waiting for attachments... (initial count: {len(message.attachments)})")
-                await asyncio.sleep(3)
-                message = await message.channel.fetch_message(message.id)
-                logging.info(f"After re-fetch: {len(message.attachments)} attachments found")
+                # Images sometimes get attached a moment later, as an edit of the message
+                if not message.attachments:
+                    logging.info("Waiting for attachments...")
+                    message = await self._wait_for_attachments(message)
+                    logging.info(f"After waiting: {len(message.attachments)} attachments found")
 
                 if message.attachments:
                     print(f"📸 Processing {len(message.attachments)} chart image(s)...")
                     await self._process_chart_images(message, signal)
                     self.pending_signal = None
-                else:
-                    # No attachments yet - store signal and wait for next message
-                    logging.warning("No attachments found, waiting for next message...")
-                    self.pending_signal = signal
-                    self.pending_signal_time = datetime.now()
 
                 # Save to database
-                signal_id = self.db.save_signal(signal)
+                signal_id = await self._run_db(self.db.save_signal, signal)
                 self.signal_count += 1
 
+                if not message.attachments:
+                    # No attachments yet - store signal and wait for next message. Only once it
+                    # has a row: a chart handled during the save would otherwise update row None
+                    # and insert the signal a second time
+                    logging.warning("No attachments found, waiting for next message...")
+                    self.pending_signal = signal
+                    self.pending_signal_time = datetime.now()
+                    self.pending_signal_id = signal_id
+
                 # Print alert
                 alert = self.notifier.format_signal_alert(signal)
-                print(alert)
+                sys.stdout.write(alert + "\n")  # One write per alert
 
                 # React
                 try:
@@ -632,6 +817,40 @@ class NeilBot(discord.Client):
             error_msg = str(e).encode('ascii', errors='ignore').decode('ascii')
             logging.error(f"Error processing message: {error_msg}", exc_info=True)
 
+    async def on_message_edit(self, before, after):
+        """Hand a message that just gained attachments to whoever is waiting for them"""
+        waiter = self._attachment_waiters.get(after.id)
+        if waiter and not waiter.done() and after.attachments and not before.attachments:
+            waiter.set_result(after)
+
+    async def _wait_for_attachments(self, message, timeout: float = 3):
+        """
+        Wait up to timeout seconds for the message to be edited to include attachments
+
+        Returns the edited message as soon as the edit arrives, or the original one on timeout.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._attachment_waiters[message.id] = waiter
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return message
+        finally:
+            self._attachment_waiters.pop(message.id, None)
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Shared session for chart downloads, so connections to Discord's CDN stay open between images"""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=60)
+            )
+        return self._http_session
+
+    async def _run_db(self, func, *args):
+        """Run a DatabaseManager call on the database thread so SQLite I/O never blocks the Discord heartbeat"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.db_executor, func, *args)
+
     async def _process_chart_images(self, message, signal: TradingSignal):
         """
         Process chart images attached to the message
@@ -647,32 +866,29 @@ class NeilBot(discord.Client):
                 continue
 
             try:
-                # Download image
-                image_path = self.temp_dir / f"chart_{message.id}_{attachment.id}.{attachment.filename.split('.')[-1]}"
-
+                # Download image - kept in memory and handed straight to the extractor,
+                # which would otherwise just read a temp file back in
                 logging.info(f"Downloading chart image: {attachment.filename}")
 
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(attachment.url) as resp:
-                        if resp.status == 200:
-                            with open(image_path, 'wb') as f:
-                                f.write(await resp.read())
-                        else:
-                            logging.error(f"Failed to download image: HTTP {resp.status}")
-                            continue
+                async with self._get_http_session().get(attachment.url) as resp:
+                    if resp.status == 200:
+                        image_bytes = await resp.read()
+                    else:
+                        logging.error(f"Failed to download image: HTTP {resp.status}")
+                        continue
 
                 # Extract prices from chart ASYNCHRONOUSLY to avoid blocking Discord heartbeat
                 logging.info(f"Extracting prices from chart (Trade: {signal.signal_type})...")
 
                 # Run extraction in a thread pool to avoid blocking
                 # Add timeout to prevent hanging forever
-                loop = asyncio.get_event_loop()
+                loop = asyncio.get_running_loop()
                 try:
                     extraction_result = await asyncio.wait_for(
                         loop.run_in_executor(
-                            self.executor,  # Use our dedicated thread pool
-                            self.chart_extractor.extract_prices,
-                            str(image_path),
+                            self.ocr_executor,  # Use our dedicated thread pool
+                            self.chart_extractor.extract_prices_from_bytes,
+                            image_bytes,
                             signal.signal_type  # Pass LONG or SHORT
                         ),
                         timeout=30  # 30 second timeout
@@ -729,12 +945,6 @@ class NeilBot(discord.Client):
                 else:
                     signal.notes = conf_note
 
-                # Clean up temp file
-                try:
-                    os.remove(image_path)
-                except:
-                    pass
-
             except Exception as e:
                 error_msg = str(e).encode('ascii', errors='ignore').decode('ascii')
                 logging.error(f"Error processing chart image: {error_msg}", exc_info=True)
@@ -750,8 +960,16 @@ class NeilBot(discord.Client):
     async def close(self):
         """Cleanup on bot shutdown"""
         # Shutdown thread pool executor
-        if hasattr(self, 'executor'):
-            self.executor.shutdown(wait=False)
+        if hasattr(self, 'ocr_executor'):
+            self.ocr_executor.shutdown(wait=False)
+        if getattr(self, '_http_session', None) and not self._http_session.closed:
+            await self._http_session.close()
+        if hasattr(self, 'db_executor'):
+            self.db_executor.shutdown(wait=True)  # Let queued saves finish first
+        if hasattr(self, 'db'):
+            self.db.close()
+        for handler in logging.getLogger().handlers:
+            handler.flush()  # Write out buffered log records
         await super().close()
 
     def get_stats(self) -> Dict:
@@ -768,15 +986,26 @@ class NeilBot(discord.Client):
 
 def setup_logging(log_level: str = "INFO"):
     """Setup logging configuration"""
+    log_format = '%(asctime)s - %(levelname)s - %(message)s'
+
+    # Buffer file writes: records reach neil_bot.log in batches of 200, or at once on a WARNING
+    # or worse, so disconnects are on disk straight away for diagnose_disconnects.py.
+    # basicConfig only formats the handlers it's given, so the wrapped file handler needs its own
+    file_handler = logging.FileHandler('neil_bot.log', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(log_format))
+    file_buffer = logging.handlers.MemoryHandler(capacity=200, flushLevel=logging.WARNING,
+                                                 target=file_handler)
+
     # Configure root logger
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(levelname)s - %(message)s',
+        format=log_format,
         handlers=[
-            logging.FileHandler('neil_bot.log', encoding='utf-8'),
+            file_buffer,
             logging.StreamHandler()
         ]
     )
+    atexit.register(file_buffer.flush)
 
     # Suppress Discord's verbose event parsing logs
     discord_logger = logging.getLogger('discord')
@@ -813,6 +1042,7 @@ def main():
     # Run bot with auto-restart
     restart_count = 0
     max_restarts = 5
+    bot = None
 
     while restart_count < max_restarts:
         try:
@@ -826,7 +1056,7 @@ def main():
 
         except KeyboardInterrupt:
             print("\n\nBot stopped by user")
-            if hasattr(locals(), 'bot'):
+            if bot is not None:
                 stats = bot.get_stats()
                 print(f"\nSession Statistics:")
                 print(f"  Messages Processed: {stats['messages_processed']}")
@@ -839,7 +1069,7 @@ def main():
             logging.warning(f"Discord connection lost, attempting restart {restart_count}/{max_restarts}")
 
             # Clean up the old bot instance
-            if hasattr(locals(), 'bot'):
+            if bot is not None:
                 try:
                     asyncio.run(bot.close())
                 except:
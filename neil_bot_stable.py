@@ -11,16 +11,24 @@ import sqlite3
 import asyncio
 import time
 import signal
+import random
+import threading
 import sys
-import os
 import aiohttp
 import logging
+import logging.handlers
+import atexit
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from concurrent.futures import ThreadPoolExecutor
 
+try:
+    from orjson import loads as _json_loads  # C parser; its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as _json_loads
+
 # Force UTF-8 encoding for Windows
 if sys.platform == 'win32':
     import codecs
@@ -48,21 +56,27 @@ class Config:
             sys.exit(1)
 
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            with open(self.config_file, 'rb') as f:
+                config = _json_loads(f.read())
         except json.JSONDecodeError as e:
             print(f"ERROR: Invalid JSON in {self.config_file}: {e}")
             sys.exit(1)
 
         self.DISCORD_TOKEN = config.get("discord_token", "")
         self.GPT4_API_KEY = config.get("gpt4_api_key", "")
-        self.CHANNEL_IDS = config.get("channel_ids", [])
+        self.CHANNEL_IDS = frozenset(config.get("channel_ids", []))
         self.NEIL_USERNAMES = config.get("neil_usernames", ["Nurse Neil 💉 | Unity"])
         self.ALERT_TAGS = config.get("alert_tags", ["@Neilarora Alerts"])
         self.DATABASE_PATH = config.get("database_path", "signals.db")
         self.LOG_LEVEL = config.get("log_level", "INFO")
         self.MIN_CONFIDENCE = config.get("min_confidence", 0.7)
 
+        # Lowercased once here so on_message doesn't redo it for every message
+        self.NEIL_USERNAMES_LC = [username.lower() for username in self.NEIL_USERNAMES]
+        self.ALERT_TAGS_LC = [tag.lower() for tag in self.ALERT_TAGS]
+        self.ALERT_TAG_RE = (re.compile("|".join(re.escape(tag) for tag in self.ALERT_TAGS_LC))
+                             if self.ALERT_TAGS_LC else None)
+
 # ============================================================================
 # DATA MODELS
 # ============================================================================
@@ -93,23 +107,49 @@ class TradingSignal:
 class DatabaseManager:
     """Handles all database operations"""
 
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-8000",  # 8 MB page cache
+    )
+
+    # One fixed statement string, so the connection's statement cache keeps it prepared
+    # across every batch instead of re-parsing it
+    INSERT_SIGNAL_SQL = """
+        INSERT INTO signals (
+            signal_type, ticker, raw_message, timestamp, confidence,
+            entry_price, stop_loss, take_profit_1, take_profit_2, take_profit_3,
+            leverage, notes, message_id, author, channel_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    BATCH_SIZE = 128       # Rows per executemany
+    FLUSH_INTERVAL = 0.5   # Seconds to wait for a batch to fill
+
     def __init__(self, db_path: str = "signals.db"):
         self.db_path = db_path
+
+        # One long-lived connection; signals are queued and written in batches
+        # by run_flusher() so a burst costs one commit instead of one per signal
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()  # Batches are written from a worker thread
+        for pragma in self.PRAGMAS:
+            self.conn.execute(pragma)
+        self._queue = asyncio.Queue()
+        self._pending = []
+
         self.init_database()
 
     def init_database(self):
         """Initialize database schema"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
+            self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS signals (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     signal_type TEXT NOT NULL,
                     ticker TEXT NOT NULL,
                     raw_message TEXT NOT NULL,
-                    timestamp DATETIME NOT NULL,
+                    timestamp INTEGER NOT NULL,  -- Microseconds since the Unix epoch
                     confidence REAL NOT NULL,
                     entry_price REAL,
                     stop_loss REAL,
@@ -124,43 +164,77 @@ class DatabaseManager:
                 )
             """)
 
-            conn.commit()
-            conn.close()
+            # Time-range reads, and per-ticker history in time order
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_ts ON signals(timestamp DESC)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_ticker_ts ON signals(ticker, timestamp)")
+
+            self.conn.commit()
             logging.info(f"Database initialized at {self.db_path}")
         except sqlite3.Error as e:
             logging.error(f"Database initialization failed: {e}")
             raise
 
-    def save_signal(self, signal: TradingSignal) -> int:
-        """Save trading signal to database"""
+    def save_signal(self, signal: TradingSignal):
+        """Queue trading signal for the next batched database write"""
+        self._queue.put_nowait((
+            signal.signal_type, signal.ticker, signal.raw_message,
+            round(signal.timestamp.timestamp() * 1_000_000), signal.confidence,
+            signal.entry_price, signal.stop_loss,
+            signal.take_profit_1, signal.take_profit_2, signal.take_profit_3,
+            signal.leverage, signal.notes,
+            signal.message_id, signal.author, signal.channel_id
+        ))
+
+    async def run_flusher(self):
+        """Write queued signals every BATCH_SIZE rows or FLUSH_INTERVAL seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.FLUSH_INTERVAL
+
+            while len(self._pending) < self.BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Off the event loop - the commit can wait on the disk, and gateway heartbeats can't
+            rows, self._pending = self._pending, []
+            write = asyncio.ensure_future(asyncio.to_thread(self._write_rows, rows))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                await write  # Let an in-flight batch land before close() shuts the connection
+                raise
+
+    def _write_rows(self, rows: List[tuple]):
+        """executemany + commit for one batch"""
+        if not rows:
+            return
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO signals (
-                    signal_type, ticker, raw_message, timestamp, confidence,
-                    entry_price, stop_loss, take_profit_1, take_profit_2, take_profit_3,
-                    leverage, notes, message_id, author, channel_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                signal.signal_type, signal.ticker, signal.raw_message,
-                signal.timestamp.isoformat(), signal.confidence,
-                signal.entry_price, signal.stop_loss,
-                signal.take_profit_1, signal.take_profit_2, signal.take_profit_3,
-                signal.leverage, signal.notes,
-                signal.message_id, signal.author, signal.channel_id
-            ))
-
-            signal_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-
-            logging.info(f"Signal saved: {signal.ticker} {signal.signal_type}")
-            return signal_id
+            with self.lock:
+                self.conn.executemany(self.INSERT_SIGNAL_SQL, rows)
+                self.conn.commit()
+            logging.info(f"{len(rows)} signal(s) saved: "
+                         + ", ".join(f"{row[1]} {row[0]}" for row in rows))
         except sqlite3.Error as e:
-            logging.error(f"Failed to save signal: {e}")
-            return -1
+            logging.error(f"Failed to save {len(rows)} signal(s): {e}")
+
+    def flush(self):
+        """Write everything still queued"""
+        while not self._queue.empty():
+            self._pending.append(self._queue.get_nowait())
+        rows, self._pending = self._pending, []
+        self._write_rows(rows)
+
+    def close(self):
+        """Flush queued signals and close the database connection"""
+        self.flush()
+        with self.lock:
+            self.conn.close()
 
 # ============================================================================
 # SIGNAL DETECTOR
@@ -191,19 +265,33 @@ class SignalDetector:
         r"(\$?[A-Z]{2,10})\s+short\s+here",
     ]
 
-    def __init__(self):
-        self.long_regex = [re.compile(p, re.IGNORECASE) for p in self.LONG_PATTERNS]
-        self.short_regex = [re.compile(p, re.IGNORECASE) for p in self.SHORT_PATTERNS]
+    # Every pattern on a side contains one of these words; a message with none of them
+    # can't match that side, and a substring check is far cheaper than 8 regex searches
+    LONG_KEYWORDS = ("long", "bought", "buying")
+    SHORT_KEYWORDS = ("short", "sold", "selling")
+
+    # "at cmp" marks a current-market-price entry
+    CMP_RE = re.compile(r"\bat\s+cmp\b", re.IGNORECASE)
+
+    # Compiled once at import and kept as separate ordered searches rather than one
+    # alternation per side: list order is their priority (an alternation returns the
+    # leftmost match instead - "now long BTC" would give NOW), and each standalone
+    # pattern keeps re's literal-prefix scan. Bound search methods skip the attribute
+    # lookup per pattern.
+    long_regex = tuple(re.compile(p, re.IGNORECASE).search for p in LONG_PATTERNS)
+    short_regex = tuple(re.compile(p, re.IGNORECASE).search for p in SHORT_PATTERNS)
 
     def detect_signal(self, message_content: str) -> Optional[TradingSignal]:
         """Detect trading signal from message content"""
 
+        lowered = message_content.lower()
+
         # Check for LONG signals
-        for pattern in self.long_regex:
-            match = pattern.search(message_content)
+        for search in (self.long_regex if any(word in lowered for word in self.LONG_KEYWORDS) else ()):
+            match = search(message_content)
             if match:
                 ticker = match.group(1).replace('$', '').upper().strip()
-                entry_type = "CMP" if re.search(r"\bat\s+cmp\b", message_content, re.IGNORECASE) else "MARKET"
+                entry_type = "CMP" if self.CMP_RE.search(message_content) else "MARKET"
 
                 return TradingSignal(
                     signal_type="LONG",
@@ -215,11 +303,11 @@ class SignalDetector:
                 )
 
         # Check for SHORT signals
-        for pattern in self.short_regex:
-            match = pattern.search(message_content)
+        for search in (self.short_regex if any(word in lowered for word in self.SHORT_KEYWORDS) else ()):
+            match = search(message_content)
             if match:
                 ticker = match.group(1).replace('$', '').upper().strip()
-                entry_type = "CMP" if re.search(r"\bat\s+cmp\b", message_content, re.IGNORECASE) else "MARKET"
+                entry_type = "CMP" if self.CMP_RE.search(message_content) else "MARKET"
 
                 return TradingSignal(
                     signal_type="SHORT",
@@ -236,6 +324,11 @@ class SignalDetector:
 # STABLE BOT CLIENT
 # ============================================================================
 
+# Shared by every StableNeilBot so reconnects reuse the same threads instead of
+# starting (and leaking) a new pool per instance; shut down once at exit
+_CHART_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='chart')
+atexit.register(_CHART_EXECUTOR.shutdown, wait=False)
+
 class StableNeilBot(discord.Client):
     """Stable Discord bot with robust connection handling"""
 
@@ -254,22 +347,22 @@ class StableNeilBot(discord.Client):
         self.message_count = 0
         self.signal_count = 0
         self.last_heartbeat = time.time()
-        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._msg_event = None  # Set by every message; created in on_ready once the loop runs
+        self.executor = _CHART_EXECUTOR
+        self.db_flusher = None
+        self.http_session = None
 
         # Chart extractor - optional
         self.chart_extractor = None
         try:
             if config.GPT4_API_KEY and config.GPT4_API_KEY != "YOUR_GPT4_API_KEY_HERE":
                 from chart_extractor import ChartPriceExtractor
-                self.chart_extractor = ChartPriceExtractor(gpt4_api_key=config.GPT4_API_KEY)
+                # Budget under the 15s extraction timeout, so a slow strategy race still returns its best result
+                self.chart_extractor = ChartPriceExtractor(gpt4_api_key=config.GPT4_API_KEY, time_budget=12)
                 logging.info("Chart extractor initialized")
         except Exception as e:
             logging.warning(f"Chart extractor not available: {e}")
 
-        # Create temp directory
-        self.temp_dir = Path("temp_charts")
-        self.temp_dir.mkdir(exist_ok=True)
-
     async def on_ready(self):
         """Called when bot is ready"""
         self.last_heartbeat = time.time()
@@ -285,33 +378,60 @@ class StableNeilBot(discord.Client):
         print("="*60)
         print("\n⏳ Waiting for signals...\n")
 
-        # Start heartbeat monitor
-        self.loop.create_task(self.heartbeat_monitor())
+        # Start heartbeat monitor (once - on_ready fires again after reconnects)
+        if self._msg_event is None:
+            self._msg_event = asyncio.Event()
+            self.loop.create_task(self.heartbeat_monitor())
+
+        # Shared HTTP session so chart downloads reuse keep-alive connections to the CDN
+        if self.http_session is None:
+            self.http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60, ttl_dns_cache=300)
+            )
+
+        # Start batched database writer (on_ready fires again after reconnects)
+        if self.db_flusher is None:
+            self.db_flusher = asyncio.create_task(self.db.run_flusher())
 
     async def heartbeat_monitor(self):
         """Monitor connection health"""
         while not self.is_closed():
-            await asyncio.sleep(30)  # Check every 30 seconds
+            self._msg_event.clear()
+
+            # Sleeps until a message arrives instead of polling the clock. asyncio.wait rather
+            # than wait_for, which can swallow a shutdown cancel landing just as the event is set
+            waiter = asyncio.ensure_future(self._msg_event.wait())
+            try:
+                done, _ = await asyncio.wait((waiter,), timeout=120)
+            finally:
+                waiter.cancel()
+
+            if not done:
+                # No activity for 2 minutes
+                logging.warning(f"No heartbeat for {time.time() - self.last_heartbeat:.0f}s")
+                continue
 
-            time_since_heartbeat = time.time() - self.last_heartbeat
-            if time_since_heartbeat > 120:  # No activity for 2 minutes
-                logging.warning(f"No heartbeat for {time_since_heartbeat:.0f}s")
+            # Connection is alive; don't wake for every message of a busy channel
+            await asyncio.sleep(30)
 
     async def on_message(self, message):
         """Process incoming messages"""
+        # Any message proves the connection is alive, but almost none are in a monitored
+        # channel - reject those before touching anything else
+        self.last_heartbeat = time.time()
+        if self._msg_event is not None:
+            self._msg_event.set()
+        if message.channel.id not in self.config.CHANNEL_IDS:
+            return
+
         try:
-            self.last_heartbeat = time.time()
             self.message_count += 1
 
-            # Skip if not in monitored channels
-            if message.channel.id not in self.config.CHANNEL_IDS:
-                return
-
             # Check if from Neil or has alert tag
-            is_from_neil = any(username.lower() in message.author.name.lower()
-                             for username in self.config.NEIL_USERNAMES)
-            has_alert_tag = any(tag.lower() in message.content.lower()
-                              for tag in self.config.ALERT_TAGS)
+            author_lc = message.author.name.lower()
+            is_from_neil = any(username in author_lc for username in self.config.NEIL_USERNAMES_LC)
+            has_alert_tag = (self.config.ALERT_TAG_RE is not None
+                             and self.config.ALERT_TAG_RE.search(message.content.lower()) is not None)
 
             if not (is_from_neil or has_alert_tag):
                 return
@@ -320,7 +440,7 @@ class StableNeilBot(discord.Client):
             signal = self.detector.detect_signal(message.content)
 
             if signal:
-                print(f"🔍 Signal detected from {message.author.name}")
+                sys.stdout.write(f"🔍 Signal detected from {message.author.name}\n")
 
                 # Enrich signal
                 signal.message_id = message.id
@@ -354,23 +474,21 @@ class StableNeilBot(discord.Client):
                 if not attachment.content_type or not attachment.content_type.startswith('image/'):
                     continue
 
-                # Download image
-                image_path = self.temp_dir / f"chart_{message.id}.png"
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(attachment.url) as resp:
-                        if resp.status == 200:
-                            with open(image_path, 'wb') as f:
-                                f.write(await resp.read())
+                # Download image - kept in memory and handed straight to the extractor,
+                # so there is no temp file to write, read back and delete
+                async with self.http_session.get(attachment.url) as resp:
+                    if resp.status != 200:
+                        logging.warning(f"Chart download failed: HTTP {resp.status}")
+                        continue
+                    image_bytes = await resp.read()
 
                 # Extract prices in background (with timeout)
                 try:
-                    loop = asyncio.get_event_loop()
                     result = await asyncio.wait_for(
-                        loop.run_in_executor(
+                        asyncio.get_running_loop().run_in_executor(
                             self.executor,
-                            self.chart_extractor.extract_prices,
-                            str(image_path),
+                            self.chart_extractor.extract_prices_from_bytes,
+                            image_bytes,
                             signal.signal_type
                         ),
                         timeout=15  # 15 second timeout
@@ -389,17 +507,11 @@ class StableNeilBot(discord.Client):
                         signal.entry_price = result.entry_price
 
                     if any([signal.stop_loss, signal.take_profit_1]):
-                        print(f"✅ Extracted prices - SL: {signal.stop_loss} | TP1: {signal.take_profit_1}")
+                        sys.stdout.write(f"✅ Extracted prices - SL: {signal.stop_loss} | TP1: {signal.take_profit_1}\n")
 
                 except asyncio.TimeoutError:
                     logging.warning("Chart extraction timed out")
 
-                # Clean up
-                try:
-                    os.remove(image_path)
-                except:
-                    pass
-
         except Exception as e:
             logging.error(f"Error processing chart: {e}")
 
@@ -407,28 +519,33 @@ class StableNeilBot(discord.Client):
         """Print formatted signal alert"""
         type_emoji = "🟢" if signal.signal_type == "LONG" else "🔴"
 
-        print(f"\n{'='*60}")
-        print(f"🚨 {type_emoji} {signal.signal_type} SIGNAL - {signal.ticker}")
-        print(f"{'='*60}")
-        print(f"Time: {signal.timestamp.strftime('%H:%M:%S')}")
-        print(f"Entry: {signal.notes if signal.notes else 'MARKET'}")
+        lines = [
+            f"\n{'='*60}",
+            f"🚨 {type_emoji} {signal.signal_type} SIGNAL - {signal.ticker}",
+            f"{'='*60}",
+            f"Time: {signal.timestamp.strftime('%H:%M:%S')}",
+            f"Entry: {signal.notes if signal.notes else 'MARKET'}",
+        ]
 
         if any([signal.entry_price, signal.stop_loss, signal.take_profit_1]):
-            print(f"\n📊 PRICE LEVELS:")
+            lines.append(f"\n📊 PRICE LEVELS:")
             if signal.entry_price:
-                print(f"  Entry:     ${signal.entry_price:,.4f}")
+                lines.append(f"  Entry:     ${signal.entry_price:,.4f}")
             if signal.stop_loss:
-                print(f"  🛑 SL:     ${signal.stop_loss:,.4f}")
+                lines.append(f"  🛑 SL:     ${signal.stop_loss:,.4f}")
             if signal.take_profit_1:
-                print(f"  🎯 TP1:    ${signal.take_profit_1:,.4f}")
+                lines.append(f"  🎯 TP1:    ${signal.take_profit_1:,.4f}")
             if signal.take_profit_2:
-                print(f"  🎯 TP2:    ${signal.take_profit_2:,.4f}")
+                lines.append(f"  🎯 TP2:    ${signal.take_profit_2:,.4f}")
             if signal.take_profit_3:
-                print(f"  🎯 TP3:    ${signal.take_profit_3:,.4f}")
+                lines.append(f"  🎯 TP3:    ${signal.take_profit_3:,.4f}")
         else:
-            print(f"\n⚠️  NO PRICES EXTRACTED - Check Discord")
+            lines.append(f"\n⚠️  NO PRICES EXTRACTED - Check Discord")
 
-        print(f"{'='*60}\n")
+        lines.append(f"{'='*60}\n")
+
+        # One write for the whole alert instead of a print per line
+        sys.stdout.write("\n".join(lines) + "\n")
 
     async def on_disconnect(self):
         """Called when bot disconnects"""
@@ -436,14 +553,34 @@ class StableNeilBot(discord.Client):
 
     async def close(self):
         """Cleanup on shutdown"""
-        if hasattr(self, 'executor'):
-            self.executor.shutdown(wait=False)
+        if getattr(self, 'db_flusher', None):
+            self.db_flusher.cancel()
+            try:
+                await self.db_flusher  # Waits out a batch that is mid-write
+            except asyncio.CancelledError:
+                pass
+            self.db_flusher = None
+        if getattr(self, 'http_session', None):
+            await self.http_session.close()
+            self.http_session = None
+        if hasattr(self, 'db'):
+            self.db.close()
+        for handler in logging.getLogger().handlers:
+            handler.flush()  # Write out buffered log records
         await super().close()
 
 # ============================================================================
 # MAIN RUNNER WITH AUTO-RESTART
 # ============================================================================
 
+def _reconnect_delay(retry_count: int):
+    """
+    Exponential backoff with full jitter: returns (cap, wait) where wait is uniform in [0, cap].
+    The jitter keeps bots that lost the gateway together from all reconnecting in lockstep.
+    """
+    backoff = min(60.0, 5.0 * (2 ** min(retry_count, 4)))
+    return backoff, random.uniform(0, backoff)
+
 async def run_bot_with_restart(config: Config, max_retries: int = 10):
     """Run bot with automatic restart on failure"""
     retry_count = 0
@@ -452,8 +589,11 @@ async def run_bot_with_restart(config: Config, max_retries: int = 10):
         try:
             bot = StableNeilBot(config)
 
-            # Run the bot
-            await bot.start(config.DISCORD_TOKEN)
+            # Run the bot - always close it, so queued signals are flushed even on Ctrl+C/SIGTERM
+            try:
+                await bot.start(config.DISCORD_TOKEN)
+            finally:
+                await bot.close()
 
         except discord.errors.LoginFailure:
             print("ERROR: Invalid Discord token!")
@@ -463,26 +603,16 @@ async def run_bot_with_restart(config: Config, max_retries: int = 10):
                 discord.errors.GatewayNotFound,
                 aiohttp.ClientError) as e:
             retry_count += 1
-            wait_time = min(60, 5 * retry_count)  # Exponential backoff, max 60s
+            backoff, wait_time = _reconnect_delay(retry_count)
 
             print(f"\n⚠️  Connection lost: {e}")
-            print(f"🔄 Reconnecting in {wait_time}s... (Attempt {retry_count}/{max_retries})")
-            logging.warning(f"Connection lost, reconnecting in {wait_time}s")
-
-            # Clean up old bot
-            try:
-                await bot.close()
-            except:
-                pass
+            print(f"🔄 Reconnecting in {wait_time:.1f}s... (Attempt {retry_count}/{max_retries})")
+            logging.warning(f"Connection lost, reconnecting in {wait_time:.1f}s (backoff cap {backoff:.0f}s)")
 
             await asyncio.sleep(wait_time)
 
         except KeyboardInterrupt:
             print("\n\n👋 Bot stopped by user")
-            try:
-                await bot.close()
-            except:
-                pass
             break
 
         except Exception as e:
@@ -491,8 +621,9 @@ async def run_bot_with_restart(config: Config, max_retries: int = 10):
             logging.error(f"Unexpected error: {e}", exc_info=True)
 
             if retry_count < max_retries:
-                wait_time = min(60, 5 * retry_count)
-                print(f"🔄 Restarting in {wait_time}s... (Attempt {retry_count}/{max_retries})")
+                backoff, wait_time = _reconnect_delay(retry_count)
+                print(f"🔄 Restarting in {wait_time:.1f}s... (Attempt {retry_count}/{max_retries})")
+                logging.warning(f"Restarting in {wait_time:.1f}s (backoff cap {backoff:.0f}s)")
                 await asyncio.sleep(wait_time)
             else:
                 print(f"\n❌ Failed after {max_retries} attempts")
@@ -502,14 +633,25 @@ async def run_bot_with_restart(config: Config, max_retries: int = 10):
 
 def setup_logging(log_level: str = "INFO"):
     """Setup logging configuration"""
+    log_format = '%(asctime)s - %(levelname)s - %(message)s'
+
+    # Buffer file writes: records reach neil_bot.log in batches of 200, or at once on a WARNING
+    # or worse, so disconnects are on disk straight away for diagnose_disconnects.py.
+    # basicConfig only formats the handlers it's given, so the wrapped file handler needs its own
+    file_handler = logging.FileHandler('neil_bot.log', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(log_format))
+    file_buffer = logging.handlers.MemoryHandler(capacity=200, flushLevel=logging.WARNING,
+                                                 target=file_handler)
+
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(levelname)s - %(message)s',
+        format=log_format,
         handlers=[
-            logging.FileHandler('neil_bot.log', encoding='utf-8'),
+            file_buffer,
             logging.StreamHandler()
         ]
     )
+    atexit.register(file_buffer.flush)
 
     # Suppress Discord's verbose logs
     for logger_name in ['discord', 'discord.http', 'discord.gateway']:
@@ -518,7 +660,9 @@ def setup_logging(log_level: str = "INFO"):
 def handle_shutdown(signum, frame):
     """Handle shutdown signals gracefully"""
     print("\n⏹️  Shutdown signal received...")
-    sys.exit(0)
+    # Unlike sys.exit, this unwinds through run_bot_with_restart's finally, which closes the
+    # bot and flushes signals still waiting in the database queue
+    raise KeyboardInterrupt
 
 def main():
     """Main entry point"""
@@ -7,8 +7,18 @@ Demonstrates the new multi-strategy approach
 import logging
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from chart_extractor import ChartPriceExtractor
+from chart_extractor import ChartPriceExtractor, ChartExtractionResult
+
+try:
+    from orjson import loads as _json_loads, dumps as _orjson_dumps
+
+    def _json_dumps(obj) -> str:
+        return _orjson_dumps(obj).decode()
+except ImportError:
+    from json import loads as _json_loads, dumps as _json_dumps
 
 # Set up logging
 logging.basicConfig(
@@ -16,6 +26,67 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+FAILURES_LOG = Path(".cache/failures.jsonl")
+
+def failed_result(error: Exception) -> ChartExtractionResult:
+    """Placeholder for an extraction that raised, so the rest of the run still reports"""
+    logging.error(f"❌ Extraction failed: {error}")
+    return ChartExtractionResult(extraction_method="failed", validation_errors=[str(error)])
+
+def log_failures(jobs, results):
+    """Append every extraction that came back without prices to FAILURES_LOG for a later re-run"""
+    failures = [
+        {"timestamp": time.time(), "image": str(image_path), "direction": trade_direction,
+         "method": result.extraction_method, "errors": result.validation_errors}
+        for (image_path, trade_direction), result in zip(jobs, results)
+        if not (result.stop_loss or result.take_profit_1)
+    ]
+    if not failures:
+        return
+
+    FAILURES_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(FAILURES_LOG, 'a', encoding='utf-8') as f:
+        f.writelines(_json_dumps(failure) + "\n" for failure in failures)
+    print(f"\n⚠️  {len(failures)} extraction(s) failed - logged to {FAILURES_LOG}")
+
+def print_result(result, trade_direction: str):
+    """Print one extraction result"""
+    print(f"\n📈 Extraction Results ({trade_direction}):")
+    print(f"   Method: {result.extraction_method}")
+    print(f"   Confidence: {result.confidence_score:.1%}")
+    print(f"   Processing Time: {result.processing_time:.2f}s")
+
+    print(f"\n💰 Extracted Prices:")
+    if result.stop_loss:
+        print(f"   🛑 Stop Loss:    ${result.stop_loss:,.4f}")
+    if result.entry_price:
+        print(f"   🎯 Entry:        ${result.entry_price:,.4f}")
+    if result.take_profit_1:
+        print(f"   ✅ Take Profit 1: ${result.take_profit_1:,.4f}")
+    if result.take_profit_2:
+        print(f"   ✅ Take Profit 2: ${result.take_profit_2:,.4f}")
+    if result.take_profit_3:
+        print(f"   ✅ Take Profit 3: ${result.take_profit_3:,.4f}")
+
+    if not any([result.stop_loss, result.take_profit_1]):
+        print(f"   ❌ No prices extracted")
+
+    # Show validation status
+    print(f"\n✔️  Validation:")
+    if result.validation_passed:
+        print(f"   ✅ All validations passed")
+    else:
+        print(f"   ⚠️  Validation issues found:")
+        for error in result.validation_errors[:3]:  # Show first 3 errors
+            print(f"      - {error}")
+
+    # Show raw extraction data if available
+    if result.raw_extraction and 'all_prices_found' in result.raw_extraction:
+        print(f"\n🔢 All prices detected in image:")
+        all_prices = result.raw_extraction.get('all_prices_found', [])
+        if all_prices:
+            print(f"   {all_prices}")
+
 def test_extraction():
     """Test the improved chart extraction"""
 
@@ -27,9 +98,8 @@ def test_extraction():
 
     # Check for API key
     try:
-        import json
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        with open('config.json', 'rb') as f:
+            config = _json_loads(f.read())
             api_key = config.get('gpt4_api_key')
 
         if not api_key or api_key == "YOUR_GPT4_API_KEY_HERE":
@@ -40,10 +110,6 @@ def test_extraction():
         print("\n⚠️  config.json not found. Please create it first.")
         return
 
-    # Initialize the extractor
-    print("\n📊 Initializing Chart Extractor...")
-    extractor = ChartPriceExtractor(gpt4_api_key=api_key)
-
     # Look for test images in temp_charts directory
     chart_dir = Path("temp_charts")
     if not chart_dir.exists():
@@ -51,8 +117,11 @@ def test_extraction():
         print("   The bot will create this when it processes Discord messages")
         return
 
-    # Find chart images
-    chart_files = list(chart_dir.glob("*.png")) + list(chart_dir.glob("*.jpg"))
+    # Find chart images in one directory pass (is_file() uses the cached dirent type);
+    # sorted so "the first 3" are the same charts on every run
+    with os.scandir(chart_dir) as entries:
+        chart_files = sorted(Path(entry.path) for entry in entries
+                             if entry.is_file() and entry.name.lower().endswith((".png", ".jpg", ".jpeg")))
 
     if not chart_files:
         print(f"\n⚠️  No chart images found in {chart_dir}")
@@ -61,57 +130,75 @@ def test_extraction():
 
     print(f"\n✅ Found {len(chart_files)} chart image(s)")
 
-    # Test each image
-    for i, image_path in enumerate(chart_files[:3], 1):  # Test first 3 images
-        print(f"\n{'='*60}")
-        print(f"TEST {i}: {image_path.name}")
-        print(f"{'='*60}")
-
-        # Test both LONG and SHORT interpretations
-        for trade_direction in ["LONG", "SHORT"]:
-            print(f"\n🔍 Testing as {trade_direction} trade...")
-
-            result = extractor.extract_prices(
-                str(image_path),
-                trade_direction=trade_direction
-            )
-
-            # Display results
-            print(f"\n📈 Extraction Results ({trade_direction}):")
-            print(f"   Method: {result.extraction_method}")
-            print(f"   Confidence: {result.confidence_score:.1%}")
-            print(f"   Processing Time: {result.processing_time:.2f}s")
-
-            print(f"\n💰 Extracted Prices:")
-            if result.stop_loss:
-                print(f"   🛑 Stop Loss:    ${result.stop_loss:,.4f}")
-            if result.entry_price:
-                print(f"   🎯 Entry:        ${result.entry_price:,.4f}")
-            if result.take_profit_1:
-                print(f"   ✅ Take Profit 1: ${result.take_profit_1:,.4f}")
-            if result.take_profit_2:
-                print(f"   ✅ Take Profit 2: ${result.take_profit_2:,.4f}")
-            if result.take_profit_3:
-                print(f"   ✅ Take Profit 3: ${result.take_profit_3:,.4f}")
-
-            if not any([result.stop_loss, result.take_profit_1]):
-                print(f"   ❌ No prices extracted")
-
-            # Show validation status
-            print(f"\n✔️  Validation:")
-            if result.validation_passed:
-                print(f"   ✅ All validations passed")
-            else:
-                print(f"   ⚠️  Validation issues found:")
-                for error in result.validation_errors[:3]:  # Show first 3 errors
-                    print(f"      - {error}")
-
-            # Show raw extraction data if available
-            if result.raw_extraction and 'all_prices_found' in result.raw_extraction:
-                print(f"\n🔢 All prices detected in image:")
-                all_prices = result.raw_extraction.get('all_prices_found', [])
-                if all_prices:
-                    print(f"   {all_prices}")
+    # Every (image, direction) extraction is an independent, network-bound API call,
+    # so run them all at once and print the results in order afterwards
+    test_images = chart_files[:3]  # Test first 3 images
+    jobs = [(image_path, trade_direction)
+            for image_path in test_images
+            for trade_direction in ["LONG", "SHORT"]]  # Test both LONG and SHORT interpretations
+
+    # Initialize the extractor - one pooled API client for every call, closed when done.
+    # Results are kept in .cache/chart_results, so re-runs over the same charts are free;
+    # editing a strategy prompt invalidates them, or delete the folder to force fresh calls
+    print("\n📊 Initializing Chart Extractor...")
+    with ChartPriceExtractor(gpt4_api_key=api_key, cache_dir=".cache/chart_results") as extractor:
+        if "--batch" in sys.argv:
+            # Batch API: half the cost, but results can take minutes to hours to come back
+            print(f"\n📮 Submitting {len(jobs)} extractions to the OpenAI Batch API...")
+            try:
+                batch_results = extractor.extract_prices_via_batch_api([str(path) for path in test_images],
+                                                                       ["LONG", "SHORT"])
+                results = [batch_results[(str(image_path), trade_direction)] for image_path, trade_direction in jobs]
+            except Exception as e:
+                results = [failed_result(e)] * len(jobs)
+        elif "--multi" in sys.argv:
+            # All charts in one request per direction; charts that fail validation are re-run singly
+            print(f"\n📚 Extracting {len(test_images)} charts with one request per direction...")
+            paths = [str(path) for path in test_images]
+
+            def extract_direction(trade_direction):
+                try:
+                    return extractor.extract_prices_batch(paths, trade_direction)
+                except Exception as e:
+                    return [failed_result(e)] * len(paths)
+
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                long_results, short_results = pool.map(extract_direction, ["LONG", "SHORT"])
+            results = [result for pair in zip(long_results, short_results) for result in pair]
+        else:
+            # Read, hash and encode each image once for both its LONG and SHORT runs
+            prepared = {}
+            for image_path in test_images:
+                try:
+                    prepared[image_path] = extractor.prepare_image(str(image_path))
+                except (OSError, ValueError) as e:
+                    print(f"\n⚠️  Skipping {image_path.name}: {e}")
+            jobs = [(image_path, trade_direction) for image_path, trade_direction in jobs
+                    if image_path in prepared]
+
+            # The extractor retries rate limits and 5xx itself; anything that still raises
+            # becomes a placeholder so one bad chart doesn't throw away the rest of the run
+            def extract_job(job):
+                image_path, trade_direction = job
+                try:
+                    return extractor.extract_prices_prepared(prepared[image_path], trade_direction=trade_direction)
+                except Exception as e:
+                    return failed_result(e)
+
+            print(f"\n🔍 Running {len(jobs)} extractions in parallel...")
+            with ThreadPoolExecutor(max_workers=8) as pool:  # Capped to stay under API rate limits
+                results = list(pool.map(extract_job, jobs))
+
+    log_failures(jobs, results)
+
+    for index, ((image_path, trade_direction), result) in enumerate(zip(jobs, results)):
+        if trade_direction == "LONG":
+            print(f"\n{'='*60}")
+            print(f"TEST {index // 2 + 1}: {image_path.name}")
+            print(f"{'='*60}")
+
+        print(f"\n🔍 Tested as {trade_direction} trade")
+        print_result(result, trade_direction)
 
     print(f"\n{'='*60}")
     print("TEST COMPLETE")
@@ -130,4 +217,6 @@ def test_extraction():
     print()
 
 if __name__ == "__main__":
+    # --batch: use the OpenAI Batch API instead of live requests
+    # --multi: send every chart in a single request per direction
     test_extraction()
\ No newline at end of file
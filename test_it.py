@@ -4,9 +4,14 @@ Test script for chart extractor
 from chart_extractor import ChartPriceExtractor
 import logging
 import sys
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    from orjson import loads as _json_loads  # C parser; its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as _json_loads
+
 logging.basicConfig(level=logging.INFO)
 
 def load_api_key():
@@ -17,8 +22,8 @@ def load_api_key():
         print("Please create config.json with your OpenAI API key")
         sys.exit(1)
 
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    with open(config_path, 'rb') as f:
+        config = _json_loads(f.read())
 
     api_key = config.get("gpt4_api_key", "")
     if not api_key or api_key == "YOUR_OPENAI_API_KEY_HERE":
@@ -28,44 +33,48 @@ def load_api_key():
 
     return api_key
 
+def print_result(image_path, result):
+    """Print the extraction results for one image"""
+    print("\n" + "="*60)
+    print(f"EXTRACTION RESULTS: {image_path}")
+    print("="*60)
+    print(f"Stop Loss:  {result.stop_loss}")
+    print(f"TP1:        {result.take_profit_1}")
+    print(f"TP2:        {result.take_profit_2}")
+    print(f"TP3:        {result.take_profit_3}")
+    print(f"Entry:      {result.entry_price}")
+    print(f"Confidence: {result.confidence_score:.1%}")
+    print(f"Method:     {result.extraction_method}")
+    print("="*60)
+
 def main():
     """Main test function"""
-    # Get image path from command line or use default
+    # Get image paths from command line
     if len(sys.argv) > 1:
-        image_path = sys.argv[1]
+        image_paths = sys.argv[1:]
     else:
-        print("Usage: python test_it.py <path_to_chart_image>")
+        print("Usage: python test_it.py <path_to_chart_image> [more images...]")
         print("\nExample: python test_it.py chart.png")
         sys.exit(1)
 
-    # Check if image exists
-    if not Path(image_path).exists():
-        print(f"ERROR: Image file not found: {image_path}")
-        sys.exit(1)
+    # Check if images exist
+    for image_path in image_paths:
+        if not Path(image_path).exists():
+            print(f"ERROR: Image file not found: {image_path}")
+            sys.exit(1)
 
     # Load API key
     api_key = load_api_key()
 
     # Initialize extractor
     print("Initializing chart extractor...")
-    extractor = ChartPriceExtractor(use_gpu=False, gpt4_api_key=api_key)
-
-    # Extract prices
-    print(f"Processing image: {image_path}")
-    result = extractor.extract_prices(image_path)
-
-    # Print results
-    print("\n" + "="*60)
-    print("EXTRACTION RESULTS")
-    print("="*60)
-    print(f"Stop Loss:  {result.stop_loss}")
-    print(f"TP1:        {result.take_profit_1}")
-    print(f"TP2:        {result.take_profit_2}")
-    print(f"TP3:        {result.take_profit_3}")
-    print(f"Entry:      {result.entry_price}")
-    print(f"Confidence: {result.confidence_score:.1%}")
-    print(f"Method:     {result.extraction_method}")
-    print("="*60)
+    with ChartPriceExtractor(gpt4_api_key=api_key) as extractor:
+        # Extract prices - the calls are network-bound, so threads sharing the
+        # extractor's pooled client overlap them; results still print in argument order
+        print(f"Processing {len(image_paths)} image(s)...")
+        with ThreadPoolExecutor(max_workers=8) as pool:  # Capped to stay under API rate limits
+            for image_path, result in zip(image_paths, pool.map(extractor.extract_prices, image_paths)):
+                print_result(image_path, result)
 
 if __name__ == "__main__":
     main()